@@ -0,0 +1,295 @@
+"""
+Throughput benchmark for the PE pipeline against the local API stand-in.
+
+Runs calculate_quarterly_pe (fmp-goog-pe-analysis.py) and
+get_quarterly_pe_with_retry (Claude_PE_History.py) for a ticker universe
+against fmp_standin_server and reports tickers/second, API calls per ticker
+and p50/p99 latency per pipeline stage.
+
+Usage:
+    python bench_pe_pipeline.py --universe 50 --latency-ms 50
+    python bench_pe_pipeline.py --tickers GOOG GOOGL --json-out bench.json
+    python bench_pe_pipeline.py --baseline bench.json --max-regression 0.2
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import requests
+
+from fmp_standin_server import start_server
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(BENCH_DIR, '..', '..'))
+LIB_DIR = os.path.abspath(os.path.join(BENCH_DIR, '..', 'lib'))
+
+
+class StageTimer:
+    """
+    Thread-safe collection of per-stage durations.
+    """
+
+    def __init__(self):
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self.lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def wrap(self, function, stage):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - started)
+        return timed
+
+    def summary(self):
+        """
+        Returns:
+        dict: {stage: {'count', 'p50_ms', 'p99_ms', 'total_s'}}
+        """
+        with self.lock:
+            samples = {stage: list(values) for stage, values in self.samples.items()}
+        return {
+            stage: {
+                'count': len(values),
+                'p50_ms': float(np.percentile(values, 50) * 1000),
+                'p99_ms': float(np.percentile(values, 99) * 1000),
+                'total_s': float(sum(values)),
+            }
+            for stage, values in samples.items()
+        }
+
+
+def load_script(path, name):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def server_stats(server):
+    return requests.get(f"{server.base_url}/_stats", timeout=10).json()
+
+
+def reset_stats(server):
+    requests.get(f"{server.base_url}/_reset", timeout=10)
+
+
+def bench_fmp(tickers, year, server):
+    """
+    Benchmark calculate_quarterly_pe from fmp-goog-pe-analysis.py
+
+    Returns:
+    dict: Benchmark results
+    """
+    pe = load_script(os.path.join(REPO_ROOT, 'fmp-goog-pe-analysis.py'), 'fmp_goog_pe_analysis')
+    timer = StageTimer()
+    for name, stage in (('get_quarterly_income_statement', 'income_statement'),
+                        ('get_quarterly_balance_sheet', 'balance_sheet'),
+                        ('get_price_series', 'price'),
+                        ('build_quarterly_pe', 'build')):
+        setattr(pe, name, timer.wrap(getattr(pe, name), stage))
+    calculate = timer.wrap(pe.calculate_quarterly_pe, 'calculate_quarterly_pe')
+
+    reset_stats(server)
+    started = time.perf_counter()
+    rows = 0
+    for ticker in tickers:
+        rows += len(calculate(ticker, year, 'standin'))
+    elapsed = time.perf_counter() - started
+
+    return _result('calculate_quarterly_pe', tickers, rows, elapsed, timer, server_stats(server))
+
+
+class ReplayTicker:
+    """
+    yfinance.Ticker look-alike reading Yahoo-shaped data from the stand-in server.
+    """
+
+    session = requests.Session()
+
+    def __init__(self, ticker, base_url, timer):
+        self.ticker = ticker
+        self.base_url = base_url
+        self.timer = timer
+
+    def _get(self, resource, stage, params=None):
+        started = time.perf_counter()
+        try:
+            response = self.session.get(f"{self.base_url}/yahoo/{self.ticker}/{resource}", params=params, timeout=30)
+            if response.status_code == 429:
+                raise Exception("429 Client Error: Too Many Requests")
+            response.raise_for_status()
+            return response.json()
+        finally:
+            self.timer.add(stage, time.perf_counter() - started)
+
+    def _statement(self, resource, stage):
+        frame = pd.DataFrame.from_dict(self._get(resource, stage), orient='index')
+        frame.columns = pd.to_datetime(frame.columns)
+        return frame
+
+    @property
+    def quarterly_income_stmt(self):
+        return self._statement('quarterly_income_stmt', 'yahoo_income_stmt')
+
+    @property
+    def quarterly_balance_sheet(self):
+        return self._statement('quarterly_balance_sheet', 'yahoo_balance_sheet')
+
+    @property
+    def info(self):
+        return self._get('info', 'yahoo_info')
+
+    def history(self, start=None, end=None, period=None):
+        bars = self._get('history', 'yahoo_history', {'start': start, 'end': end})
+        if not bars:
+            return pd.DataFrame(columns=['Close'])
+        frame = pd.DataFrame(bars)
+        frame.index = pd.DatetimeIndex(pd.to_datetime(frame.pop('date'))).tz_localize('America/New_York')
+        return frame
+
+
+def bench_yfinance(tickers, year, server):
+    """
+    Benchmark get_quarterly_pe_with_retry from Claude_PE_History.py
+
+    Returns:
+    dict: Benchmark results, or None when the script's dependencies are missing
+    """
+    try:
+        history = load_script(os.path.join(REPO_ROOT, 'Claude_PE_History.py'), 'claude_pe_history')
+    except ImportError as e:
+        print(f"Skipping get_quarterly_pe_with_retry benchmark: {e}")
+        return None
+
+    timer = StageTimer()
+    history.yf = SimpleNamespace(Ticker=lambda ticker: ReplayTicker(ticker, server.base_url, timer))
+    calculate = timer.wrap(history.get_quarterly_pe_with_retry, 'get_quarterly_pe_with_retry')
+
+    reset_stats(server)
+    started = time.perf_counter()
+    rows = 0
+    for ticker in tickers:
+        rows += len(calculate(ticker, year))
+    elapsed = time.perf_counter() - started
+
+    return _result('get_quarterly_pe_with_retry', tickers, rows, elapsed, timer, server_stats(server))
+
+
+def _result(name, tickers, rows, elapsed, timer, stats):
+    requests_made = stats.get('requests', 0)
+    return {
+        'pipeline': name,
+        'tickers': len(tickers),
+        'rows': rows,
+        'elapsed_s': elapsed,
+        'tickers_per_s': len(tickers) / elapsed if elapsed else float('inf'),
+        'calls_per_ticker': requests_made / len(tickers) if tickers else 0.0,
+        'server': stats,
+        'stages': timer.summary(),
+    }
+
+
+def print_result(result):
+    print(f"\n{result['pipeline']}: {result['tickers']} tickers, {result['rows']} rows in {result['elapsed_s']:.2f} s")
+    print(f"  Tickers/second:   {result['tickers_per_s']:.2f}")
+    print(f"  API calls/ticker: {result['calls_per_ticker']:.2f} "
+          f"(429: {result['server'].get('429', 0)}, errors: {result['server'].get('errors', 0)})")
+    print(f"  {'Stage':<30}{'count':>8}{'p50 ms':>12}{'p99 ms':>12}")
+    for stage, values in sorted(result['stages'].items()):
+        print(f"  {stage:<30}{values['count']:>8}{values['p50_ms']:>12.1f}{values['p99_ms']:>12.1f}")
+
+
+def check_regressions(results, baseline_path, max_regression):
+    """
+    Compare throughput with a previous --json-out run
+
+    Returns:
+    bool: True when no pipeline got slower than allowed
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {result['pipeline']: result for result in json.load(f)}
+
+    ok = True
+    for result in results:
+        previous = baseline.get(result['pipeline'])
+        if previous is None:
+            continue
+        floor = previous['tickers_per_s'] * (1 - max_regression)
+        if result['tickers_per_s'] < floor:
+            print(f"REGRESSION {result['pipeline']}: {result['tickers_per_s']:.2f} tickers/s "
+                  f"< {floor:.2f} (baseline {previous['tickers_per_s']:.2f})")
+            ok = False
+        if result['calls_per_ticker'] > previous['calls_per_ticker'] * (1 + max_regression):
+            print(f"REGRESSION {result['pipeline']}: {result['calls_per_ticker']:.2f} calls/ticker "
+                  f"(baseline {previous['calls_per_ticker']:.2f})")
+            ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the PE pipeline against the local API stand-in.')
+    parser.add_argument('--tickers', nargs='+', help='Tickers to benchmark')
+    parser.add_argument('--universe', type=int, default=20, help='Number of synthetic tickers when --tickers is not given')
+    parser.add_argument('--year', type=int, default=2010, help='Year to analyze with FMP (default: 2010)')
+    parser.add_argument('--yahoo-year', type=int, default=date.today().year - 1,
+                        help='Year to analyze with yfinance, which only has the last ~5 quarters (default: last year)')
+    parser.add_argument('--pipeline', choices=['fmp', 'yfinance', 'all'], default='all', help='Pipeline(s) to run')
+    parser.add_argument('--data-dir', help='Directory with recorded responses (see fmp_standin_server.py)')
+    parser.add_argument('--latency-ms', type=float, default=30.0, help='Mean stand-in latency in milliseconds')
+    parser.add_argument('--jitter-ms', type=float, default=10.0, help='Stand-in latency standard deviation')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of HTTP 500 responses')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='Fraction of HTTP 429 responses')
+    parser.add_argument('--warm-cache', action='store_true', help='Keep the on-disk price cache and PE snapshots between runs')
+    parser.add_argument('--json-out', help='Write results as JSON (usable as --baseline later)')
+    parser.add_argument('--baseline', help='Previous --json-out file to compare against')
+    parser.add_argument('--max-regression', type=float, default=0.2, help='Allowed relative slowdown (default: 0.2)')
+    args = parser.parse_args()
+
+    tickers = args.tickers or [f"T{i:04d}" for i in range(args.universe)]
+    server = start_server(data_dir=args.data_dir, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                          error_rate=args.error_rate, rate_429=args.rate_429, retry_after=0)
+
+    # The FinSources library reads these when it is first imported
+    os.environ['FMP_BASE_URL'] = f"{server.base_url}/api/v3"
+    os.environ.setdefault('FMP_CALLS_PER_MINUTE', '60000')
+    if not args.warm_cache:
+        os.environ['FINSOURCES_CACHE_DIR'] = tempfile.mkdtemp(prefix='finsources-bench-')
+    sys.path.insert(0, LIB_DIR)
+
+    results = []
+    if args.pipeline in ('fmp', 'all'):
+        results.append(bench_fmp(tickers, args.year, server))
+    if args.pipeline in ('yfinance', 'all'):
+        result = bench_yfinance(tickers, args.yahoo_year, server)
+        if result is not None:
+            results.append(result)
+
+    for result in results:
+        print_result(result)
+
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.json_out}")
+
+    if args.baseline and not check_regressions(results, args.baseline, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
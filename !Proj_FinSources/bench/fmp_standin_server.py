@@ -0,0 +1,344 @@
+"""
+Local stand-in for the FMP and Yahoo Finance APIs used by the PE scripts.
+
+Replays recorded responses from a data directory (synthesizing deterministic
+data for tickers that were not recorded) with configurable latency, error
+rate and HTTP 429 rate, so the PE pipeline can be measured without touching
+the live APIs.
+
+Data directory layout (as written by record_fmp_responses):
+    <data_dir>/income-statement/<TICKER>.json
+    <data_dir>/balance-sheet-statement/<TICKER>.json
+    <data_dir>/historical-price-full/<TICKER>.json
+    <data_dir>/earnings-surprises/<TICKER>.json
+
+FMP endpoints are served under /api/v3/<endpoint>/<TICKER>, Yahoo-shaped data
+under /yahoo/<TICKER>/<quarterly_income_stmt|quarterly_balance_sheet|history|info>.
+
+Usage:
+    python fmp_standin_server.py --port 8765 --latency-ms 80 --rate-429 0.02
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FMP_ENDPOINTS = ['income-statement', 'balance-sheet-statement', 'historical-price-full', 'earnings-surprises']
+
+SYNTHETIC_FIRST_YEAR = 2005
+
+
+def _seed(ticker):
+    return zlib.crc32(ticker.upper().encode())
+
+
+def _quarter_ends(first_year, last_date):
+    ends = []
+    for year in range(first_year, last_date.year + 1):
+        for month, day in ((3, 31), (6, 30), (9, 30), (12, 31)):
+            quarter_end = date(year, month, day)
+            if quarter_end <= last_date:
+                ends.append(quarter_end)
+    return ends
+
+
+def synthesize(endpoint, ticker):
+    """
+    Generate deterministic FMP-shaped data for a ticker that was not recorded
+
+    Parameters:
+    endpoint (str): One of FMP_ENDPOINTS
+    ticker (str): Stock ticker symbol
+
+    Returns:
+    list | dict: Response body in the shape FMP returns it
+    """
+    rng = random.Random(_seed(ticker))
+    today = date.today()
+    shares = rng.uniform(2e8, 1.5e10)
+    quarter_ends = _quarter_ends(SYNTHETIC_FIRST_YEAR, today - timedelta(days=45))
+
+    if endpoint == 'income-statement':
+        income = rng.uniform(1e8, 5e9)
+        rows = []
+        for quarter_end in quarter_ends:
+            income *= rng.uniform(0.95, 1.07)
+            rows.append({'date': quarter_end.isoformat(), 'symbol': ticker, 'period': f"Q{(quarter_end.month - 1) // 3 + 1}",
+                         'calendarYear': str(quarter_end.year), 'revenue': income * 4.5, 'netIncome': income,
+                         'eps': income / shares})
+        return rows[::-1]
+
+    if endpoint == 'balance-sheet-statement':
+        rows = [{'date': quarter_end.isoformat(), 'symbol': ticker, 'commonStock': shares,
+                 'commonStockSharesOutstanding': shares} for quarter_end in quarter_ends]
+        return rows[::-1]
+
+    if endpoint == 'earnings-surprises':
+        rows = []
+        for quarter_end in quarter_ends:
+            estimate = round(rng.uniform(0.2, 3.0), 2)
+            rows.append({'date': (quarter_end + timedelta(days=28)).isoformat(), 'symbol': ticker,
+                         'actualEarningResult': round(estimate * rng.uniform(0.85, 1.2), 2),
+                         'estimatedEarning': estimate})
+        return rows[::-1]
+
+    if endpoint == 'historical-price-full':
+        price = rng.uniform(10, 300)
+        bars = []
+        day = date(SYNTHETIC_FIRST_YEAR, 1, 3)
+        while day <= today:
+            if day.weekday() < 5:
+                price *= 1 + rng.gauss(0.0003, 0.018)
+                bars.append({'date': day.isoformat(), 'open': round(price * 0.995, 4), 'high': round(price * 1.01, 4),
+                             'low': round(price * 0.99, 4), 'close': round(price, 4), 'adjClose': round(price, 4),
+                             'volume': rng.randint(100_000, 50_000_000)})
+            day += timedelta(days=1)
+        return {'symbol': ticker, 'historical': bars[::-1]}
+
+    raise KeyError(endpoint)
+
+
+class ResponseStore:
+    """
+    Recorded responses with synthetic fallback, cached in memory.
+    """
+
+    def __init__(self, data_dir=None):
+        self.data_dir = data_dir
+        self.cache = {}
+        self.lock = threading.Lock()
+
+    def get(self, endpoint, ticker):
+        key = (endpoint, ticker.upper())
+        with self.lock:
+            if key in self.cache:
+                return self.cache[key]
+        body = None
+        if self.data_dir:
+            path = os.path.join(self.data_dir, endpoint, f"{ticker.upper()}.json")
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    body = json.load(f)
+        if body is None:
+            body = synthesize(endpoint, ticker)
+        with self.lock:
+            self.cache[key] = body
+        return body
+
+
+def _yahoo_body(store, ticker, resource, query):
+    # Yahoo-shaped data is derived from the same FMP data, see ReplayTicker in bench_pe_pipeline.py
+    if resource == 'quarterly_income_stmt':
+        rows = store.get('income-statement', ticker)[:5]
+        return {'Net Income': {row['date']: row['netIncome'] for row in rows}}
+    if resource == 'quarterly_balance_sheet':
+        rows = store.get('balance-sheet-statement', ticker)[:5]
+        return {'Common Stock Shares Outstanding': {row['date']: row['commonStockSharesOutstanding'] for row in rows}}
+    if resource == 'history':
+        start = query.get('start', '0000')
+        end = query.get('end', '9999')
+        bars = store.get('historical-price-full', ticker).get('historical', [])
+        return [{'date': bar['date'], 'Close': bar['close']} for bar in bars if start <= bar['date'] <= end][::-1]
+    if resource == 'info':
+        rows = store.get('balance-sheet-statement', ticker)
+        return {'symbol': ticker, 'sharesOutstanding': rows[0]['commonStockSharesOutstanding'] if rows else None}
+    raise KeyError(resource)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode('utf-8')
+        if 'gzip' in self.headers.get('Accept-Encoding', '') and len(payload) > 1024:
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+            payload = compressor.compress(payload) + compressor.flush()
+            headers = dict(headers or {}, **{'Content-Encoding': 'gzip'})
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        query = {name: values[0] for name, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split('/') if part]
+
+        if parts == ['_stats']:
+            self._send(200, server.stats_snapshot())
+            return
+        if parts == ['_reset']:
+            server.reset_stats()
+            self._send(200, {})
+            return
+
+        server.count('requests')
+        if server.latency > 0 or server.jitter > 0:
+            time.sleep(max(0.0, server.rng_gauss(server.latency, server.jitter)))
+
+        if server.rng_random() < server.rate_429:
+            server.count('429')
+            self._send(429, {'Error Message': 'Limit Reach'}, {'Retry-After': str(server.retry_after)})
+            return
+        if server.rng_random() < server.error_rate:
+            server.count('errors')
+            self._send(500, {'Error Message': 'Internal Server Error'})
+            return
+
+        try:
+            if len(parts) == 4 and parts[:2] == ['api', 'v3'] and parts[2] in FMP_ENDPOINTS:
+                endpoint, ticker = parts[2], parts[3]
+                server.count(endpoint)
+                body = server.store.get(endpoint, ticker)
+                if endpoint == 'historical-price-full':
+                    start = query.get('from', '0000')
+                    end = query.get('to', '9999')
+                    bars = [bar for bar in body.get('historical', []) if start <= bar['date'][:10] <= end]
+                    body = {'symbol': ticker, 'historical': bars} if bars else {}
+                elif 'limit' in query:
+                    body = body[:int(query['limit'])]
+            elif len(parts) == 3 and parts[0] == 'yahoo':
+                server.count(f"yahoo-{parts[2]}")
+                body = _yahoo_body(server.store, parts[1], parts[2], query)
+            else:
+                self._send(404, {'Error Message': f"Unknown endpoint {url.path}"})
+                return
+        except KeyError:
+            self._send(404, {'Error Message': f"Unknown endpoint {url.path}"})
+            return
+
+        self._send(200, body)
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, data_dir=None, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0,
+                 rate_429=0.0, retry_after=1, seed=0, verbose=False):
+        super().__init__(address, StandInHandler)
+        self.store = ResponseStore(data_dir)
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.verbose = verbose
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    def rng_random(self):
+        with self._lock:
+            return self._rng.random()
+
+    def rng_gauss(self, mu, sigma):
+        with self._lock:
+            return self._rng.gauss(mu, sigma)
+
+    def count(self, name):
+        with self._lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def stats_snapshot(self):
+        with self._lock:
+            return dict(self.stats)
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {}
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_server(port=0, **options):
+    """
+    Start a stand-in server in a background thread
+
+    Parameters:
+    port (int): Port to listen on (0 = any free port)
+    options: See StandInServer (data_dir, latency_ms, jitter_ms, error_rate, rate_429, retry_after, seed)
+
+    Returns:
+    StandInServer: Running server; FMP base URL is server.base_url + "/api/v3"
+    """
+    server = StandInServer(('127.0.0.1', port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def record_fmp_responses(tickers, api_key, data_dir):
+    """
+    Record live FMP responses into a data directory for later replay
+
+    Parameters:
+    tickers (list): Stock ticker symbols
+    api_key (str): FMP API key
+    data_dir (str): Target directory
+    """
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+    import lib_FmpClient
+
+    client = lib_FmpClient.get_default_client()
+    for ticker in tickers:
+        for endpoint in FMP_ENDPOINTS:
+            params = {'period': 'quarter'} if endpoint in ('income-statement', 'balance-sheet-statement') else None
+            body = client.get_json(f"{endpoint}/{ticker}", params, api_key)
+            if body is None:
+                continue
+            os.makedirs(os.path.join(data_dir, endpoint), exist_ok=True)
+            with open(os.path.join(data_dir, endpoint, f"{ticker.upper()}.json"), 'w', encoding='utf-8') as f:
+                json.dump(body, f)
+            print(f"Recorded {endpoint} for {ticker}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the FMP / Yahoo Finance APIs.')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on (default: 8765)')
+    parser.add_argument('--data-dir', help='Directory with recorded responses')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Mean response latency in milliseconds')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Latency standard deviation in milliseconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with HTTP 500')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='Fraction of requests answered with HTTP 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429 responses')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for latency and error injection')
+    parser.add_argument('--record', nargs='+', metavar='TICKER', help='Record live FMP responses into --data-dir and exit')
+    parser.add_argument('--api-key', default=os.environ.get('FMP_API_KEY'), help='FMP API key for --record')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    if args.record:
+        if not args.data_dir or not args.api_key:
+            parser.error('--record needs --data-dir and --api-key (or FMP_API_KEY)')
+        record_fmp_responses(args.record, args.api_key, args.data_dir)
+        return
+
+    server = StandInServer(('127.0.0.1', args.port), data_dir=args.data_dir, latency_ms=args.latency_ms,
+                           jitter_ms=args.jitter_ms, error_rate=args.error_rate, rate_429=args.rate_429,
+                           retry_after=args.retry_after, seed=args.seed, verbose=args.verbose)
+    print(f"Serving FMP stand-in at {server.base_url}/api/v3 (set FMP_BASE_URL to use it)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
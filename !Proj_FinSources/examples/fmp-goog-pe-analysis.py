@@ -1,10 +1,34 @@
+import os
+import sys
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import requests
-import time
 from datetime import datetime
 import json
 
+# Make the shared FinSources library importable from the repo root and from examples/
+_HERE = os.path.dirname(os.path.abspath(__file__))
+for _lib_dir in (os.path.join(_HERE, '!Proj_FinSources', 'lib'), os.path.join(_HERE, '..', 'lib')):
+    if os.path.isdir(_lib_dir) and _lib_dir not in sys.path:
+        sys.path.insert(0, _lib_dir)
+
+# All FMP requests go through the shared pooled, rate-limited client (lib_FmpClient)
+from lib_FInSources import get_quarterly_income_statement, get_quarterly_balance_sheet, get_price_series
+from lib_AsyncBatch import fetch_batch_sync
+from lib_PriceSeries import PriceSeries, NEAREST
+from lib_QuarterlyPE import build_quarterly_pe_history, calculate_quarterly_pe_range, update_quarterly_pe_history
+import lib_ChartRender
+import lib_PEBatch
+import lib_PESnapshots
+
+def get_snapshot_store():
+    """
+    Get the store of computed quarters used for incremental batch runs
+    
+    Returns:
+    PESnapshotStore: Snapshots of the FMP pipeline (see lib_PESnapshots)
+    """
+    return lib_PESnapshots.PESnapshotStore(source='fmp')
+
 def get_goog_tickers():
     """
     Get a list of tickers that contain 'GOOG'
@@ -22,79 +46,17 @@ def get_goog_tickers():
 
 def get_api_key():
     """
-    Get FMP API key from user
+    Get FMP API key from the FMP_API_KEY environment variable or the user
     
     Returns:
     str: API key
     """
+    api_key = os.environ.get("FMP_API_KEY")
+    if api_key:
+        return api_key
     api_key = input("Enter your Financial Modeling Prep API key: ")
     return api_key
 
-def get_quarterly_income_statement(ticker, api_key):
-    """
-    Get quarterly income statement data from FMP API
-    
-    Parameters:
-    ticker (str): Stock ticker symbol
-    api_key (str): FMP API key
-    
-    Returns:
-    list: List of quarterly income statement data
-    """
-    url = f"https://financialmodelingprep.com/api/v3/income-statement/{ticker}?period=quarter&apikey={api_key}"
-    response = requests.get(url)
-    
-    if response.status_code == 200:
-        data = response.json()
-        return data
-    else:
-        print(f"Error fetching income statement: {response.status_code}")
-        return []
-
-def get_quarterly_balance_sheet(ticker, api_key):
-    """
-    Get quarterly balance sheet data from FMP API
-    
-    Parameters:
-    ticker (str): Stock ticker symbol
-    api_key (str): FMP API key
-    
-    Returns:
-    list: List of quarterly balance sheet data
-    """
-    url = f"https://financialmodelingprep.com/api/v3/balance-sheet-statement/{ticker}?period=quarter&apikey={api_key}"
-    response = requests.get(url)
-    
-    if response.status_code == 200:
-        data = response.json()
-        return data
-    else:
-        print(f"Error fetching balance sheet: {response.status_code}")
-        return []
-
-def get_historical_price(ticker, from_date, to_date, api_key):
-    """
-    Get historical stock price data from FMP API
-    
-    Parameters:
-    ticker (str): Stock ticker symbol
-    from_date (str): Start date in YYYY-MM-DD format
-    to_date (str): End date in YYYY-MM-DD format
-    api_key (str): FMP API key
-    
-    Returns:
-    list: List of historical price data
-    """
-    url = f"https://financialmodelingprep.com/api/v3/historical-price-full/{ticker}?from={from_date}&to={to_date}&apikey={api_key}"
-    response = requests.get(url)
-    
-    if response.status_code == 200:
-        data = response.json()
-        return data.get('historical', [])
-    else:
-        print(f"Error fetching historical prices: {response.status_code}")
-        return []
-
 def find_closest_price(date_str, price_data):
     """
     Find the closest price to a given date
@@ -106,19 +68,15 @@ def find_closest_price(date_str, price_data):
     Returns:
     float: Closing price on the closest date
     """
-    target_date = datetime.strptime(date_str, "%Y-%m-%d")
-    closest_price = None
-    min_diff = float('inf')
-    
-    for price_point in price_data:
-        price_date = datetime.strptime(price_point['date'], "%Y-%m-%d")
-        diff = abs((target_date - price_date).days)
-        
-        if diff < min_diff:
-            min_diff = diff
-            closest_price = price_point['close']
-    
-    return closest_price
+    if not price_data:
+        return None
+    
+    # For many dates build the PriceSeries once and use PriceSeries.lookup directly
+    price = PriceSeries.from_fmp(price_data).lookup([date_str], NEAREST)[0]
+    return None if np.isnan(price) else float(price)
+
+def _filter_year(data, year):
+    return [item for item in data if item['date'].startswith(str(year))]
 
 def calculate_quarterly_pe(ticker, year, api_key):
     """
@@ -146,9 +104,71 @@ def calculate_quarterly_pe(ticker, year, api_key):
         print("Failed to retrieve balance sheet data.")
         return pd.DataFrame()
     
+    # Skip the price download when there is nothing to price
+    if not _filter_year(income_data, year) or not _filter_year(balance_data, year):
+        return build_quarterly_pe(ticker, year, income_data, balance_data, [])
+    
+    # Get historical prices for the year from the local price store
+    from_date = f"{year}-01-01"
+    to_date = f"{year}-12-31"
+    price_data = get_price_series(ticker, from_date, to_date, api_key)
+    
+    return build_quarterly_pe(ticker, year, income_data, balance_data, price_data)
+
+def calculate_quarterly_pe_batch(tickers, year, api_key, max_concurrency=8):
+    """
+    Calculate quarterly P/E ratios for many tickers, downloading concurrently
+    
+    The income statement, balance sheet and price history of all tickers are
+    fetched in parallel (see lib_AsyncBatch) instead of three serial round
+    trips per ticker.
+    
+    Parameters:
+    tickers (list): Stock ticker symbols
+    year (int): Year to analyze
+    api_key (str): FMP API key
+    max_concurrency (int): Maximum number of requests in flight
+    
+    Returns:
+    dict: {ticker: pd.DataFrame with quarterly P/E ratios}
+    """
+    print(f"Fetching quarterly financial data for {len(tickers)} tickers in {year}...")
+    fetched = fetch_batch_sync(
+        tickers, ["income_statement", "balance_sheet", "price_series"], api_key,
+        f"{year}-01-01", f"{year}-12-31", max_concurrency,
+    )
+    
+    results = {}
+    for ticker in tickers:
+        data = fetched[ticker]
+        if not data["income_statement"]:
+            print(f"Failed to retrieve income statement data for {ticker}.")
+            results[ticker] = pd.DataFrame()
+        elif not data["balance_sheet"]:
+            print(f"Failed to retrieve balance sheet data for {ticker}.")
+            results[ticker] = pd.DataFrame()
+        else:
+            results[ticker] = build_quarterly_pe(ticker, year, data["income_statement"],
+                                                 data["balance_sheet"], data["price_series"])
+    return results
+
+def build_quarterly_pe(ticker, year, income_data, balance_data, price_data):
+    """
+    Build the quarterly P/E table from already downloaded FMP data
+    
+    Parameters:
+    ticker (str): Stock ticker symbol
+    year (int): Year to analyze
+    income_data (list): Quarterly income statements (get_quarterly_income_statement)
+    balance_data (list): Quarterly balance sheets (get_quarterly_balance_sheet)
+    price_data (PriceSeries | list): Prices covering the year (get_price_series or get_historical_price)
+    
+    Returns:
+    pd.DataFrame: DataFrame with quarterly P/E ratios
+    """
     # Filter data for the specified year
-    income_data = [item for item in income_data if item['date'].startswith(str(year))]
-    balance_data = [item for item in balance_data if item['date'].startswith(str(year))]
+    income_data = _filter_year(income_data, year)
+    balance_data = _filter_year(balance_data, year)
     
     if not income_data:
         print(f"No income statement data available for {ticker} in {year}")
@@ -158,73 +178,69 @@ def calculate_quarterly_pe(ticker, year, api_key):
         print(f"No balance sheet data available for {ticker} in {year}")
         return pd.DataFrame()
     
-    # Get historical price data for the year
-    from_date = f"{year}-01-01"
-    to_date = f"{year}-12-31"
-    price_data = get_historical_price(ticker, from_date, to_date, api_key)
-    
     if not price_data:
         print(f"No historical price data available for {ticker} in {year}")
         return pd.DataFrame()
     
-    # Calculate P/E for each quarter
-    results = []
+    # Join statements and prices for the year in one vectorized pass
+    return build_quarterly_pe_history(income_data, balance_data, price_data, year, year)
+
+def run_batch(tickers, year_from, year_to, api_key, out_path, chart_dir=None, max_workers=4, resume=True,
+              incremental=True):
+    """
+    Compute quarterly P/E ratios of many tickers without any user interaction
     
-    for quarter in income_data:
-        try:
-            quarter_date = quarter['date']
-            quarter_month = int(quarter_date.split('-')[1])
-            quarter_num = (quarter_month - 1) // 3 + 1
-            
-            # Get net income
-            net_income = quarter['netIncome']
-            
-            # Find matching balance sheet data
-            matching_balance = next((item for item in balance_data if item['date'] == quarter_date), None)
-            if not matching_balance:
-                print(f"No matching balance sheet data for {quarter_date}")
-                continue
-            
-            # Get shares outstanding
-            # FMP generally uses 'commonStock' for shares outstanding, but we'll check alternatives
-            shares = matching_balance.get('commonStock')
-            if not shares or shares == 0:
-                shares = matching_balance.get('commonStockSharesOutstanding')
-            
-            if not shares or shares == 0:
-                print(f"Could not find valid shares outstanding for {quarter_date}")
-                continue
-            
-            # Calculate EPS
-            eps = net_income / shares
-            
-            # Get stock price at quarter end
-            price = find_closest_price(quarter_date, price_data)
-            
-            if not price:
-                print(f"Could not find price data for {quarter_date}")
-                continue
-            
-            # Calculate P/E ratio
-            pe_ratio = price / eps if eps != 0 else float('inf')
-            
-            results.append({
-                'Quarter': f"Q{quarter_num} {year}",
-                'Date': quarter_date,
-                'Price': price,
-                'EPS': eps,
-                'P/E Ratio': pe_ratio
-            })
-            
-        except Exception as e:
-            print(f"Error calculating P/E for {quarter_date}: {e}")
-    
-    # Sort results by date
-    results.sort(key=lambda x: x['Date'])
-    
-    return pd.DataFrame(results)
+    Results are appended to out_path as each ticker completes, so an
+    interrupted run keeps its progress and a rerun only computes the
+    tickers that are still missing (see lib_PEBatch.run_batch).
+    
+    Parameters:
+    tickers (list): Stock ticker symbols
+    year_from (int): First year to analyze
+    year_to (int): Last year to analyze
+    api_key (str): FMP API key
+    out_path (str): Results file, JSON lines or CSV (see lib_ResultSink)
+    chart_dir (str): Directory for headless PNG charts (default: no charts)
+    max_workers (int): Maximum number of tickers processed at the same time
+    resume (bool): Skip tickers already in out_path (False: overwrite it)
+    incremental (bool): Only download new statements and recompute changed quarters
+                        (False: recompute the whole span)
+    
+    Returns:
+    int: Number of tickers written in this run
+    """
+    # Every ticker's span comes from one download per endpoint (shared rate-limited client)
+    if incremental:
+        store = get_snapshot_store()
+        compute = lambda ticker: update_quarterly_pe_history(ticker, year_from, year_to, api_key, store)
+    else:
+        compute = lambda ticker: calculate_quarterly_pe_range(ticker, year_from, year_to, api_key)
+    
+    return lib_PEBatch.run_batch(tickers, compute, year_from, year_to, out_path, chart_dir, max_workers, resume)
+
+def parse_args(argv=None):
+    parser = lib_PEBatch.build_parser(
+        'Quarterly P/E ratios from Financial Modeling Prep. Without tickers an interactive menu is shown.')
+    parser.add_argument('--api-key', default=os.environ.get('FMP_API_KEY'),
+                        help='FMP API key (default: FMP_API_KEY environment variable)')
+    parser.add_argument('--full-refresh', action='store_true',
+                        help='Recompute every quarter instead of only new and changed ones')
+    args = lib_PEBatch.parse_args(parser, argv)
+    if lib_PEBatch.is_batch(args) and not args.api_key:
+        parser.error('an API key is required: pass --api-key or set FMP_API_KEY')
+    return args
 
 def main():
+    args = parse_args()
+    if not lib_PEBatch.is_batch(args):
+        interactive_main()
+        return
+    tickers = lib_PEBatch.read_tickers(args)
+    if tickers:
+        run_batch(tickers, args.year_from, args.year_to, args.api_key, args.out, args.charts, args.workers,
+                  not args.no_resume, not args.full_refresh)
+
+def interactive_main():
     # Get list of Google tickers
     print("Getting list of Google tickers...")
     goog_tickers = get_goog_tickers()
@@ -275,25 +291,7 @@ def main():
     print(f"Data saved to {csv_filename}")
     
     # Plot the results
-    plt.figure(figsize=(10, 6))
-    quarters = quarterly_pe['Quarter'].tolist()
-    pe_ratios = quarterly_pe['P/E Ratio'].tolist()
-    
-    plt.bar(range(len(quarters)), pe_ratios)
-    plt.xticks(range(len(quarters)), quarters)
-    plt.title(f"{selected_ticker} Quarterly P/E Ratios - {year}")
-    plt.ylabel("P/E Ratio")
-    plt.xlabel("Quarter")
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    
-    # Add values above bars
-    for i, value in enumerate(pe_ratios):
-        plt.text(i, value + 1, f"{value:.2f}", ha='center')
-    
-    plt.tight_layout()
-    plt.savefig(f"{selected_ticker}_PE_Ratios_{year}.png")
-    print(f"Plot saved as {selected_ticker}_PE_Ratios_{year}.png")
-    plt.show()
+    lib_ChartRender.plot_quarterly_pe(quarterly_pe, selected_ticker, year)
 
 if __name__ == "__main__":
     main()
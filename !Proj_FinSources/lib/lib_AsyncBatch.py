@@ -0,0 +1,85 @@
+import asyncio
+
+import lib_FInSources
+
+# Endpoint name -> fetch function. Every fetcher returns exactly what the
+# matching lib_FInSources function returns, so results can be fed to the
+# existing DataFrame-building code unchanged.
+ENDPOINTS = {
+    "price": lambda ticker, api_key, from_date, to_date, client:
+        lib_FInSources.get_historical_price(ticker, from_date, to_date, api_key, client=client),
+    "price_series": lambda ticker, api_key, from_date, to_date, client:
+        lib_FInSources.get_price_series(ticker, from_date, to_date, api_key, client=client),
+    "income_statement": lambda ticker, api_key, from_date, to_date, client:
+        lib_FInSources.get_quarterly_income_statement(ticker, api_key, client),
+    "balance_sheet": lambda ticker, api_key, from_date, to_date, client:
+        lib_FInSources.get_quarterly_balance_sheet(ticker, api_key, client),
+    "earnings_surprises": lambda ticker, api_key, from_date, to_date, client:
+        lib_FInSources.get_earnings_surprises(ticker, api_key, client),
+}
+
+
+async def fetch_batch(tickers, endpoints, api_key, from_date=None, to_date=None,
+                      max_concurrency=8, client=None):
+    """
+    Fetch several endpoints for many tickers concurrently
+
+    Requests run in worker threads on top of the shared pooled, rate-limited
+    FMP client, so the token bucket and the price cache still apply. At most
+    max_concurrency requests are in flight at any time.
+
+    Parameters:
+    tickers (list): Stock ticker symbols
+    endpoints (list): Endpoint names, see ENDPOINTS
+    api_key (str): FMP API key
+    from_date (str): Start date in YYYY-MM-DD format (used by "price" and "price_series")
+    to_date (str): End date in YYYY-MM-DD format (used by "price" and "price_series")
+    max_concurrency (int): Maximum number of requests in flight
+    client (FmpClient): Client to use (default: the shared process-wide client)
+
+    Yields:
+    tuple: (ticker, endpoint, data) in the order the requests complete
+    """
+    unknown = [endpoint for endpoint in endpoints if endpoint not in ENDPOINTS]
+    if unknown:
+        raise ValueError(f"Unknown endpoint(s): {', '.join(unknown)}")
+    if ("price" in endpoints or "price_series" in endpoints) and (from_date is None or to_date is None):
+        raise ValueError("from_date and to_date are required for the price endpoints")
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch_one(ticker, endpoint):
+        async with semaphore:
+            data = await asyncio.to_thread(ENDPOINTS[endpoint], ticker, api_key, from_date, to_date, client)
+        return ticker, endpoint, data
+
+    tasks = [asyncio.ensure_future(fetch_one(ticker, endpoint))
+             for ticker in tickers for endpoint in endpoints]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Consumer stopped early - do not start the remaining requests
+        for task in tasks:
+            task.cancel()
+
+
+def fetch_batch_sync(tickers, endpoints, api_key, from_date=None, to_date=None,
+                     max_concurrency=8, client=None):
+    """
+    Blocking wrapper around fetch_batch for non-async callers
+
+    Parameters:
+    See fetch_batch
+
+    Returns:
+    dict: {ticker: {endpoint: data}}
+    """
+    async def collect():
+        results = {ticker: {} for ticker in tickers}
+        async for ticker, endpoint, data in fetch_batch(tickers, endpoints, api_key, from_date, to_date,
+                                                        max_concurrency, client):
+            results[ticker][endpoint] = data
+        return results
+
+    return asyncio.run(collect())
@@ -0,0 +1,346 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+
+def draw_pe_chart(fig, quarterly_pe, ticker, period_label):
+    """
+    Draw the quarterly P/E bar chart
+
+    Parameters:
+    fig (Figure): Figure to draw on (cleared by the caller)
+    quarterly_pe (pd.DataFrame): 'Quarter' and 'P/E Ratio' columns
+    ticker (str): Stock ticker symbol
+    period_label (str | int): Year or span shown in the title
+    """
+    ax = fig.add_subplot(1, 1, 1)
+    quarters = quarterly_pe['Quarter'].tolist()
+    pe_ratios = quarterly_pe['P/E Ratio'].tolist()
+
+    ax.bar(range(len(quarters)), pe_ratios)
+    ax.set_xticks(range(len(quarters)))
+    ax.set_xticklabels(quarters, rotation=90 if len(quarters) > 8 else 0)
+    ax.set_title(f"{ticker} Quarterly P/E Ratios - {period_label}")
+    ax.set_ylabel("P/E Ratio")
+    ax.set_xlabel("Quarter")
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+
+    # Add values above bars
+    for i, value in enumerate(pe_ratios):
+        ax.text(i, value + 1, f"{value:.2f}", ha='center')
+
+
+def draw_earnings_chart(fig, earnings_data, ticker):
+    """
+    Draw EPS actual vs. estimate and the surprise percentage side by side
+
+    Parameters:
+    fig (Figure): Figure to draw on (cleared by the caller)
+    earnings_data (pd.DataFrame): 'Quarter', 'EPS Actual', 'EPS Estimate', 'Surprise(%)' columns
+    ticker (str): Stock ticker symbol
+    """
+    ax = fig.add_subplot(1, 2, 1)
+    ax.bar(earnings_data['Quarter'], earnings_data['EPS Actual'])
+    ax.plot(earnings_data['Quarter'], earnings_data['EPS Estimate'], 'r--o', label='EPS Estimate')
+    ax.set_title(f'{ticker} Quarterly EPS')
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+    ax = fig.add_subplot(1, 2, 2)
+    ax.bar(earnings_data['Quarter'], earnings_data['Surprise(%)'])
+    ax.axhline(y=0, color='r', linestyle='-', alpha=0.3)
+    ax.set_title(f'{ticker} Earnings Surprise %')
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.grid(True, alpha=0.3)
+
+
+def draw_earnings_history_chart(fig, earnings_data, ticker, since, revenue_data=None):
+    """
+    Draw EPS, surprise percentage and (optionally) revenue / net income history
+
+    Parameters:
+    fig (Figure): Figure to draw on (cleared by the caller)
+    earnings_data (pd.DataFrame): 'Quarter', 'EPS Actual', 'EPS Estimate', 'Surprise(%)' columns
+    ticker (str): Title prefix, e.g. "Apple (AAPL)"
+    since (int): First year shown, used in the titles
+    revenue_data (pd.DataFrame): 'Quarter', 'Revenue (Millions)', 'Net Income (Millions)' columns
+    """
+    num_rows = 3 if revenue_data is not None else 2
+
+    # EPS visualization
+    ax = fig.add_subplot(num_rows, 1, 1)
+    width = 0.35
+    x = np.arange(len(earnings_data['Quarter']))
+    ax.bar(x - width/2, earnings_data['EPS Actual'], width, label='EPS Actual')
+    ax.bar(x + width/2, earnings_data['EPS Estimate'], width, label='EPS Estimate')
+    ax.set_title(f'{ticker} Quarterly EPS Since {since}')
+    ax.set_xlabel('Quarter')
+    ax.set_ylabel('Earnings Per Share ($)')
+    ax.set_xticks(x)
+    ax.set_xticklabels(earnings_data['Quarter'], rotation=90)
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+    # Surprise percentage visualization
+    ax = fig.add_subplot(num_rows, 1, 2)
+    colors = np.where(earnings_data['Surprise(%)'].to_numpy() >= 0, 'green', 'red')
+    ax.bar(earnings_data['Quarter'], earnings_data['Surprise(%)'], color=colors)
+    ax.axhline(y=0, color='black', linestyle='-', alpha=0.3)
+    ax.set_title(f'{ticker} Earnings Surprise % Since {since}')
+    ax.set_xlabel('Quarter')
+    ax.set_ylabel('Surprise (%)')
+    ax.tick_params(axis='x', labelrotation=90)
+    ax.grid(True, alpha=0.3)
+
+    # Revenue visualization (if data is available)
+    if revenue_data is not None:
+        ax = fig.add_subplot(num_rows, 1, 3)
+        ax.plot(revenue_data['Quarter'], revenue_data['Revenue (Millions)'], 'b-o', label='Revenue')
+        ax.plot(revenue_data['Quarter'], revenue_data['Net Income (Millions)'], 'g-o', label='Net Income')
+        ax.set_title(f'{ticker} Quarterly Revenue and Net Income Since {since}')
+        ax.set_xlabel('Quarter')
+        ax.set_ylabel('Amount ($ Millions)')
+        ax.tick_params(axis='x', labelrotation=90)
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+
+
+# Chart kind -> (draw function, figure size in inches)
+CHARTS = {
+    'pe': (draw_pe_chart, (10, 6)),
+    'earnings': (draw_earnings_chart, (12, 6)),
+    'earnings_history': (draw_earnings_history_chart, (15, 10)),
+}
+
+# Figures reused between jobs of the same kind within one process
+_templates = {}
+
+
+def _figsize(kind, figsize, options):
+    if figsize is not None:
+        return tuple(figsize)
+    # The earnings history gets a third row when revenue data is shown
+    if kind == 'earnings_history' and options.get('revenue_data') is not None:
+        return (15, 15)
+    return CHARTS[kind][1]
+
+
+def _template(kind, figsize):
+    fig = _templates.get((kind, figsize))
+    if fig is None:
+        # A bare Figure with an Agg canvas never touches pyplot or a GUI backend
+        fig = Figure(figsize=figsize, dpi=100)
+        FigureCanvasAgg(fig)
+        _templates[(kind, figsize)] = fig
+    else:
+        fig.clear()
+    return fig
+
+
+def render_chart(kind, path, figsize=None, **options):
+    """
+    Render one chart headlessly to a PNG file
+
+    Parameters:
+    kind (str): Chart kind, see CHARTS
+    path (str): Output PNG path
+    figsize (tuple): Figure size in inches (default: the kind's size)
+    options: Arguments of the kind's draw function
+
+    Returns:
+    str: path
+    """
+    draw = CHARTS[kind][0]
+    fig = _template(kind, _figsize(kind, figsize, options))
+    draw(fig, **options)
+    fig.tight_layout()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fig.savefig(path)
+    return path
+
+
+def show_chart(kind, path, figsize=None, **options):
+    """
+    Draw a chart in an interactive pyplot window, saving it to a PNG file first
+
+    Parameters:
+    kind (str): Chart kind, see CHARTS
+    path (str): Output PNG path
+    figsize (tuple): Figure size in inches (default: the kind's size)
+    options: Arguments of the kind's draw function
+    """
+    import matplotlib.pyplot as plt
+
+    draw = CHARTS[kind][0]
+    fig = plt.figure(figsize=_figsize(kind, figsize, options))
+    draw(fig, **options)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.show()
+
+
+class ChartRenderer:
+    """
+    Renders charts for many tickers in a process pool without blocking the caller.
+
+    Each worker process keeps one figure per chart kind and reuses it for
+    every job. Use as a context manager or call close() when done.
+    """
+
+    def __init__(self, processes=None):
+        """
+        Parameters:
+        processes (int): Number of worker processes (default: number of CPUs)
+        """
+        self.executor = ProcessPoolExecutor(max_workers=processes)
+        self.futures = []
+
+    def submit(self, kind, path, **options):
+        """
+        Queue a chart for rendering
+
+        Parameters:
+        kind (str): Chart kind, see CHARTS
+        path (str): Output PNG path
+        options: Arguments of the kind's draw function (must be picklable)
+
+        Returns:
+        Future: Resolves to path when the PNG has been written
+        """
+        future = self.executor.submit(render_chart, kind, path, **options)
+        self.futures.append(future)
+        return future
+
+    def wait(self):
+        """
+        Wait for all submitted charts
+
+        Returns:
+        list: Paths of the charts written successfully
+        """
+        written = []
+        for future in as_completed(self.futures):
+            try:
+                written.append(future.result())
+            except Exception as e:
+                print(f"Error rendering chart: {e}")
+        self.futures = []
+        return written
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.wait()
+        self.close()
+
+
+def render_charts(jobs, processes=None):
+    """
+    Render a batch of charts in parallel and wait for them
+
+    Parameters:
+    jobs (list): Dicts with 'kind', 'path' and the draw function's arguments
+    processes (int): Number of worker processes (default: number of CPUs)
+
+    Returns:
+    list: Paths of the charts written successfully
+    """
+    with ChartRenderer(processes) as renderer:
+        for job in jobs:
+            job = dict(job)
+            renderer.submit(job.pop('kind'), job.pop('path'), **job)
+        return renderer.wait()
+
+
+def pe_chart_path(ticker, period_label, out_dir="."):
+    """
+    Parameters:
+    ticker (str): Stock ticker symbol
+    period_label (str | int): Year or span shown in the title
+    out_dir (str): Directory for the PNG file
+
+    Returns:
+    str: Path of the ticker's P/E chart, e.g. "GOOGL_PE_Ratios_2024.png"
+    """
+    return os.path.join(out_dir, f"{ticker}_PE_Ratios_{period_label}.png")
+
+
+def plot_quarterly_pe(quarterly_pe, ticker, period_label, show=True):
+    """
+    Plot quarterly P/E ratios and save the chart as PNG
+
+    Parameters:
+    quarterly_pe (pd.DataFrame): 'Quarter' and 'P/E Ratio' columns
+    ticker (str): Stock ticker symbol
+    period_label (str | int): Year or span shown in the title and file name
+    show (bool): Open an interactive window; False renders headlessly
+
+    Returns:
+    str: PNG file name
+    """
+    png_filename = pe_chart_path(ticker, period_label, "")
+    chart = show_chart if show else render_chart
+    chart('pe', png_filename, quarterly_pe=quarterly_pe, ticker=ticker, period_label=period_label)
+    print(f"Plot saved as {png_filename}")
+    return png_filename
+
+
+def render_pe_charts(results, period_label, out_dir=".", processes=None):
+    """
+    Render P/E charts for many tickers headlessly in a process pool
+
+    Parameters:
+    results (dict): {ticker: pd.DataFrame with quarterly P/E ratios}, empty frames are skipped
+    period_label (str | int): Year or span shown in the titles and file names
+    out_dir (str): Directory for the PNG files
+    processes (int): Number of worker processes (default: number of CPUs)
+
+    Returns:
+    list: Paths of the charts written successfully
+    """
+    jobs = [
+        {'kind': 'pe', 'path': pe_chart_path(ticker, period_label, out_dir),
+         'quarterly_pe': quarterly_pe, 'ticker': ticker, 'period_label': period_label}
+        for ticker, quarterly_pe in results.items() if not quarterly_pe.empty
+    ]
+    return render_charts(jobs, processes)
+
+
+def minmax_indices(values, buckets):
+    """
+    Positions of the points to keep when drawing a long series at a given width
+
+    The series is split into buckets (typically one per pixel column) and the
+    minimum and maximum of each bucket are kept, plus the first and last point,
+    so the drawn line looks the same as the full series.
+
+    Parameters:
+    values (np.ndarray): Series values without NaN
+    buckets (int): Number of buckets, e.g. the plot width in pixels
+
+    Returns:
+    np.ndarray: Ascending positions into values (all of them when the series is short)
+    """
+    count = len(values)
+    buckets = max(int(buckets), 1)
+    if count <= 2 * buckets:
+        return np.arange(count)
+    size = -(-count // buckets)
+    # Pad the last bucket with NaN so the series can be reshaped into rows of one bucket each
+    padded = np.full(size * -(-count // size), np.nan)
+    padded[:count] = values
+    rows = padded.reshape(-1, size)
+    offsets = np.arange(len(rows)) * size
+    keep = np.concatenate(([0, count - 1], offsets + np.nanargmin(rows, axis=1), offsets + np.nanargmax(rows, axis=1)))
+    return np.unique(keep)
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+import lib_AsyncBatch
+
+# FMP earnings-surprises fields -> column names used by the earnings scripts
+EARNINGS_COLUMNS = {
+    'symbol': 'Ticker',
+    'date': 'Earnings Date',
+    'actualEarningResult': 'EPS Actual',
+    'estimatedEarning': 'EPS Estimate',
+    'actualEPS': 'EPS Actual',
+    'estimatedEPS': 'EPS Estimate',
+    'surprisePercentage': 'Surprise(%)',
+}
+
+
+def prepare_surprises(frame):
+    """
+    Normalise an earnings-surprise frame to the script column names
+
+    Adds 'Surprise(%)' when the source does not provide it.
+
+    Parameters:
+    frame (pd.DataFrame): FMP earnings-surprises rows (one or many tickers)
+
+    Returns:
+    pd.DataFrame: Frame with Ticker, Earnings Date, EPS Actual, EPS Estimate, Surprise(%)
+    """
+    frame = frame.rename(columns={source: target for source, target in EARNINGS_COLUMNS.items()
+                                  if source in frame.columns and target not in frame.columns})
+    frame['Earnings Date'] = pd.to_datetime(frame['Earnings Date'])
+    frame['EPS Actual'] = pd.to_numeric(frame['EPS Actual'], errors='coerce')
+    frame['EPS Estimate'] = pd.to_numeric(frame['EPS Estimate'], errors='coerce')
+    if 'Surprise(%)' not in frame.columns:
+        estimate = frame['EPS Estimate'].abs().replace(0, np.nan)
+        frame['Surprise(%)'] = (frame['EPS Actual'] - frame['EPS Estimate']) / estimate * 100
+    return frame
+
+
+def load_earnings_surprises(tickers, api_key, since=None, max_concurrency=8, client=None):
+    """
+    Download earnings surprises of many tickers into one long-format frame
+
+    Parameters:
+    tickers (list): Stock ticker symbols
+    api_key (str): FMP API key
+    since (str): Keep only earnings on or after this date (YYYY-MM-DD)
+    max_concurrency (int): Maximum number of requests in flight
+    client (FmpClient): Client to use (default: the shared process-wide client)
+
+    Returns:
+    pd.DataFrame: One row per ticker and earnings date, see prepare_surprises()
+    """
+    fetched = lib_AsyncBatch.fetch_batch_sync(tickers, ['earnings_surprises'], api_key,
+                                              max_concurrency=max_concurrency, client=client)
+    frames = []
+    for ticker in tickers:
+        rows = fetched[ticker].get('earnings_surprises')
+        if rows:
+            frame = pd.DataFrame(rows)
+            frame['symbol'] = ticker
+            frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=['Ticker', 'Earnings Date', 'EPS Actual', 'EPS Estimate', 'Surprise(%)'])
+
+    earnings = prepare_surprises(pd.concat(frames, ignore_index=True))
+    if since is not None:
+        earnings = earnings[earnings['Earnings Date'] >= pd.Timestamp(since)]
+    return earnings.sort_values(['Ticker', 'Earnings Date']).reset_index(drop=True)
+
+
+def _outcomes(earnings):
+    # Beat / miss / meet flags computed once for the whole frame
+    actual = earnings['EPS Actual'].to_numpy(dtype=float)
+    estimate = earnings['EPS Estimate'].to_numpy(dtype=float)
+    return earnings.assign(
+        _beat=(actual > estimate).astype(np.int64),
+        _miss=(actual < estimate).astype(np.int64),
+        _meet=(actual == estimate).astype(np.int64),
+        _positive=(earnings['Surprise(%)'].to_numpy(dtype=float) > 0).astype(np.int64),
+    )
+
+
+def summarize_surprises(earnings, by='Ticker'):
+    """
+    Beat/miss/meet counts and rates and average surprise per group
+
+    Parameters:
+    earnings (pd.DataFrame): Long-format frame, see prepare_surprises()
+    by (str | list): Grouping column(s); None summarises the whole frame as one group
+
+    Returns:
+    pd.DataFrame: quarters, beat_count, miss_count, meet_count, beat_rate,
+                  miss_rate, meet_rate (in %) and avg_surprise per group
+    """
+    flagged = _outcomes(earnings)
+    if by is None:
+        flagged = flagged.assign(_all='All')
+        by = '_all'
+
+    summary = flagged.groupby(by, sort=True).agg(
+        quarters=('_beat', 'size'),
+        beat_count=('_beat', 'sum'),
+        miss_count=('_miss', 'sum'),
+        meet_count=('_meet', 'sum'),
+        avg_surprise=('Surprise(%)', 'mean'),
+    )
+    for outcome in ('beat', 'miss', 'meet'):
+        summary[f'{outcome}_rate'] = summary[f'{outcome}_count'] / summary['quarters'] * 100
+    summary = summary[['quarters', 'beat_count', 'miss_count', 'meet_count',
+                       'beat_rate', 'miss_rate', 'meet_rate', 'avg_surprise']]
+    if by == '_all':
+        summary.index.name = None
+    return summary
+
+
+def fiscal_year_stats(earnings, by=('Ticker',), fiscal_year_column='Fiscal Year'):
+    """
+    Per fiscal year EPS and surprise statistics
+
+    Parameters:
+    earnings (pd.DataFrame): Long-format frame with a fiscal year column
+    by (tuple): Grouping columns in front of the fiscal year (() for a single ticker)
+    fiscal_year_column (str): Name of the fiscal year column
+
+    Returns:
+    pd.DataFrame: avg_eps_actual, avg_eps_estimate, avg_surprise, beat_count
+                  (quarters with a positive surprise) and quarters per group
+    """
+    flagged = _outcomes(earnings)
+    keys = [column for column in by if column in flagged.columns] + [fiscal_year_column]
+    return flagged.groupby(keys, sort=True).agg(
+        avg_eps_actual=('EPS Actual', 'mean'),
+        avg_eps_estimate=('EPS Estimate', 'mean'),
+        avg_surprise=('Surprise(%)', 'mean'),
+        beat_count=('_positive', 'sum'),
+        quarters=('_positive', 'size'),
+    )
@@ -1,24 +1,188 @@
-import requests
+import lib_FmpClient
+import lib_PriceCache
+import lib_StreamingJson
+from lib_PriceSeries import PriceSeries
 
-def get_historical_price(ticker, from_date, to_date, api_key):
+
+def _get_json(path, params, api_key, what, client=None):
+    # fetch_json shares the call with identical concurrent requests (GUI refresh + PE run...)
+    client = client or lib_FmpClient.get_default_client()
+    status, data = client.fetch_json(path, params, api_key)
+
+    if status == 200:
+        return data
+    else:
+        print(f"Error fetching {what}: {status if status is not None else 'connection error'}")
+        return None
+
+def get_quarterly_income_statement(ticker, api_key, client=None, limit=None):
+    """
+    Get quarterly income statement data from FMP API
+
+    Parameters:
+    ticker (str): Stock ticker symbol
+    api_key (str): FMP API key
+    client (FmpClient): Client to use (default: the shared process-wide client)
+    limit (int): Only the most recent quarters (default: all available)
+
+    Returns:
+    list: List of quarterly income statement data, newest first
+    """
+    params = {"period": "quarter"}
+    if limit is not None:
+        params["limit"] = limit
+    data = _get_json(f"income-statement/{ticker}", params, api_key, "income statement", client)
+    return data or []
+
+def get_quarterly_balance_sheet(ticker, api_key, client=None, limit=None):
+    """
+    Get quarterly balance sheet data from FMP API
+
+    Parameters:
+    ticker (str): Stock ticker symbol
+    api_key (str): FMP API key
+    client (FmpClient): Client to use (default: the shared process-wide client)
+    limit (int): Only the most recent quarters (default: all available)
+
+    Returns:
+    list: List of quarterly balance sheet data, newest first
+    """
+    params = {"period": "quarter"}
+    if limit is not None:
+        params["limit"] = limit
+    data = _get_json(f"balance-sheet-statement/{ticker}", params, api_key, "balance sheet", client)
+    return data or []
+
+def get_earnings_surprises(ticker, api_key, client=None):
+    """
+    Get historical earnings surprises (actual vs. estimated EPS) from FMP API
+
+    Parameters:
+    ticker (str): Stock ticker symbol
+    api_key (str): FMP API key
+    client (FmpClient): Client to use (default: the shared process-wide client)
+
+    Returns:
+    list: List of earnings surprise data
+    """
+    data = _get_json(f"earnings-surprises/{ticker}", None, api_key, "earnings surprises", client)
+    return data or []
+
+def _fetch_historical_price(ticker, from_date, to_date, api_key, client=None):
+    """
+    Download historical stock price data from FMP API (no caching)
+
+    Parameters:
+    ticker (str): Stock ticker symbol
+    from_date (str): Start date in YYYY-MM-DD format
+    to_date (str): End date in YYYY-MM-DD format
+    api_key (str): FMP API key
+    client (FmpClient): Client to use (default: the shared process-wide client)
+
+    Returns:
+    list: List of historical price data, or None on error
+    """
+    data = _get_json(f"historical-price-full/{ticker}", {"from": from_date, "to": to_date}, api_key,
+                     "historical prices", client)
+    if data is None:
+        return None
+    return data.get('historical', [])
+
+def get_historical_price(ticker, from_date, to_date, api_key, use_cache=True, cache=None, client=None):
     """
     Get historical stock price data from FMP API
-    
+
+    Bars are kept in a persistent per-ticker cache (see lib_PriceCache), so only
+    the part of the range that has not been downloaded yet is requested from FMP.
+
     Parameters:
     ticker (str): Stock ticker symbol
     from_date (str): Start date in YYYY-MM-DD format
     to_date (str): End date in YYYY-MM-DD format
     api_key (str): FMP API key
-    
+    use_cache (bool): Serve already downloaded bars from the local cache
+    cache (PriceCache): Cache to use (default: the shared process-wide cache)
+    client (FmpClient): Client to use (default: the shared process-wide client)
+
     Returns:
     list: List of historical price data
     """
-    url = f"https://financialmodelingprep.com/api/v3/historical-price-full/{ticker}?from={from_date}&to={to_date}&apikey={api_key}"
-    response = requests.get(url)
-    
-    if response.status_code == 200:
-        data = response.json()
-        return data.get('historical', [])
-    else:
-        print(f"Error fetching historical prices: {response.status_code}")
-        return []
\ No newline at end of file
+    if not use_cache:
+        return _fetch_historical_price(ticker, from_date, to_date, api_key, client) or []
+
+    cache = cache or lib_PriceCache.get_default_cache()
+    data = cache.get(
+        ticker, from_date, to_date,
+        lambda start, end: _fetch_historical_price(ticker, start, end, api_key, client),
+    )
+    return data or []
+
+def get_price_series(ticker, from_date, to_date, api_key, cache=None, client=None):
+    """
+    Get historical closing prices from FMP API as a PriceSeries
+
+    Like get_historical_price, but the prices are read from the cache's
+    columnar store (see lib_PriceStore) without a dictionary per bar.
+
+    Parameters:
+    ticker (str): Stock ticker symbol
+    from_date (str): Start date in YYYY-MM-DD format
+    to_date (str): End date in YYYY-MM-DD format
+    api_key (str): FMP API key
+    cache (PriceCache): Cache to use (default: the shared process-wide cache)
+    client (FmpClient): Client to use (default: the shared process-wide client)
+
+    Returns:
+    PriceSeries: Closing prices, empty on error
+    """
+    cache = cache or lib_PriceCache.get_default_cache()
+    series = cache.get_series(
+        ticker, from_date, to_date,
+        lambda start, end: _fetch_historical_price(ticker, start, end, api_key, client),
+    )
+    return series if series is not None else PriceSeries([], [])
+
+def stream_historical_price(ticker, from_date, to_date, api_key, sink=None, client=None, chunk_size=64 * 1024):
+    """
+    Stream historical stock price data from FMP API into a sink (no caching)
+
+    The 'historical' array is parsed incrementally while the response is being
+    downloaded, so peak memory is proportional to the sink's output instead of
+    the whole JSON object graph.
+
+    Parameters:
+    ticker (str): Stock ticker symbol
+    from_date (str): Start date in YYYY-MM-DD format
+    to_date (str): End date in YYYY-MM-DD format
+    api_key (str): FMP API key
+    sink (object): Receives every bar via sink.append(bar) or sink(bar)
+                   (default: a new lib_StreamingJson.ColumnSink)
+    client (FmpClient): Client to use (default: the shared process-wide client)
+    chunk_size (int): Number of bytes read from the response at a time
+
+    Returns:
+    object: The sink, or None on error
+    """
+    client = client or lib_FmpClient.get_default_client()
+    sink = sink if sink is not None else lib_StreamingJson.ColumnSink()
+    add = sink.append if hasattr(sink, 'append') else sink
+
+    response = client.request(f"historical-price-full/{ticker}", {"from": from_date, "to": to_date},
+                              api_key, stream=True)
+    if response is None or response.status_code != 200:
+        status = response.status_code if response is not None else "connection error"
+        print(f"Error fetching historical prices: {status}")
+        if response is not None:
+            response.close()
+        return None
+
+    try:
+        for bar in lib_StreamingJson.iter_array_items(response.iter_content(chunk_size), 'historical'):
+            add(bar)
+    except ValueError as e:
+        print(f"Error parsing historical prices: {e}")
+        return None
+    finally:
+        response.close()
+
+    return sink
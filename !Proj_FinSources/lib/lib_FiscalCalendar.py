@@ -0,0 +1,181 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from lib_PriceCache import DEFAULT_CACHE_DIR
+
+# Month in which the fiscal year ends, for companies not ending in December
+KNOWN_FISCAL_YEAR_ENDS = {
+    'AAPL': 9,
+    'MSFT': 6,
+    'NVDA': 1,
+    'ORCL': 5,
+    'CSCO': 7,
+    'ADBE': 11,
+    'NKE': 5,
+    'WMT': 1,
+    'COST': 8,
+    'DIS': 9,
+    'V': 9,
+}
+
+
+def fiscal_periods(dates, fiscal_year_end_month=12):
+    """
+    Map dates to fiscal year and fiscal quarter in one vectorized operation
+
+    A fiscal year is named after the calendar year in which it ends
+    (e.g. Apple's fiscal 2016 runs from October 2015 to September 2016).
+
+    Parameters:
+    dates (pd.Series): Datetime values
+    fiscal_year_end_month (int | array-like): Month (1-12) the fiscal year ends in,
+                                              either one value or one per row
+
+    Returns:
+    tuple: (fiscal_year, fiscal_quarter) as integer pd.Series aligned with dates
+    """
+    dates = pd.to_datetime(pd.Series(dates))
+    month = dates.dt.month.to_numpy()
+    year = dates.dt.year.to_numpy()
+    end_month = np.broadcast_to(np.asarray(fiscal_year_end_month, dtype=np.int64), month.shape)
+
+    fiscal_year = year + (month > end_month)
+    fiscal_quarter = ((month - end_month - 1) % 12) // 3 + 1
+    return (pd.Series(fiscal_year, index=dates.index, dtype='int64'),
+            pd.Series(fiscal_quarter, index=dates.index, dtype='int64'))
+
+
+def quarter_labels(dates):
+    """
+    Calendar quarter labels like '2015-Q3' built without per-row strftime
+
+    Parameters:
+    dates (pd.Series): Datetime values
+
+    Returns:
+    pd.Series: Labels aligned with dates
+    """
+    dates = pd.to_datetime(pd.Series(dates))
+    return dates.dt.year.astype(str) + '-Q' + dates.dt.quarter.astype(str)
+
+
+class FiscalCalendar:
+    """
+    Per-company fiscal-year-end table with vectorized date mapping.
+
+    Fiscal-year-end months come from KNOWN_FISCAL_YEAR_ENDS, then from a
+    persisted table of previously inferred values, then (when an API key is
+    given) from the month of the company's last reported fiscal Q4 on FMP.
+    """
+
+    def __init__(self, api_key=None, default_month=12, table_path=None):
+        """
+        Parameters:
+        api_key (str): FMP API key used to infer unknown fiscal year ends (optional)
+        default_month (int): Fiscal-year-end month assumed when nothing is known
+        table_path (str): JSON file persisting inferred values
+                          (default: DEFAULT_CACHE_DIR/fiscal_year_ends.json)
+        """
+        self.api_key = api_key
+        self.default_month = default_month
+        self.table_path = table_path or os.path.join(DEFAULT_CACHE_DIR, "fiscal_year_ends.json")
+        self.lock = threading.Lock()
+        self.table = dict(KNOWN_FISCAL_YEAR_ENDS)
+        try:
+            with open(self.table_path, "r", encoding="utf-8") as f:
+                self.table.update({ticker: int(month) for ticker, month in json.load(f).items()})
+        except (OSError, ValueError):
+            pass
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.table_path), exist_ok=True)
+        tmp_path = f"{self.table_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.table, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.table_path)
+
+    def _infer(self, ticker):
+        import lib_FInSources
+
+        statements = lib_FInSources.get_quarterly_income_statement(ticker, self.api_key)
+        q4_dates = [row['date'] for row in statements if row.get('period') == 'Q4' and row.get('date')]
+        if not q4_dates:
+            return None
+        return int(max(q4_dates)[5:7])
+
+    def fiscal_year_end(self, ticker):
+        """
+        Parameters:
+        ticker (str): Stock ticker symbol
+
+        Returns:
+        int: Month (1-12) in which the company's fiscal year ends
+        """
+        key = ticker.upper()
+        with self.lock:
+            if key in self.table:
+                return self.table[key]
+        if self.api_key is None:
+            return self.default_month
+
+        month = self._infer(key)
+        if month is None:
+            return self.default_month
+        with self.lock:
+            self.table[key] = month
+            self._save()
+        return month
+
+    def set_fiscal_year_end(self, ticker, month):
+        with self.lock:
+            self.table[ticker.upper()] = int(month)
+            self._save()
+
+    def add_fiscal_columns(self, frame, date_column, ticker=None, ticker_column=None,
+                           year_column='Fiscal Year', quarter_column='Fiscal Quarter'):
+        """
+        Add fiscal year and fiscal quarter columns to a frame
+
+        Parameters:
+        frame (pd.DataFrame): Rows of one or many companies
+        date_column (str): Column with the dates to map
+        ticker (str): Company of all rows (single-company frames)
+        ticker_column (str): Column with each row's ticker (long-format frames)
+        year_column (str): Name of the fiscal year column to add
+        quarter_column (str): Name of the fiscal quarter column to add (None to skip)
+
+        Returns:
+        pd.DataFrame: The frame with the fiscal columns added
+        """
+        if ticker_column is not None:
+            # One table lookup per distinct ticker, then a vectorized map
+            ends = {value: self.fiscal_year_end(value) for value in frame[ticker_column].dropna().unique()}
+            end_month = frame[ticker_column].map(ends).fillna(self.default_month).to_numpy(dtype=np.int64)
+        else:
+            end_month = self.fiscal_year_end(ticker) if ticker else self.default_month
+
+        fiscal_year, fiscal_quarter = fiscal_periods(frame[date_column], end_month)
+        frame[year_column] = fiscal_year.to_numpy()
+        if quarter_column:
+            frame[quarter_column] = fiscal_quarter.to_numpy()
+        return frame
+
+
+_default_calendar = None
+
+
+def get_default_calendar():
+    """
+    Get the process-wide fiscal calendar (no FMP inference)
+
+    Returns:
+    FiscalCalendar: Shared calendar instance
+    """
+    global _default_calendar
+    if _default_calendar is None:
+        _default_calendar = FiscalCalendar()
+    return _default_calendar
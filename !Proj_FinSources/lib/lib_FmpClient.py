@@ -0,0 +1,251 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+import requests
+from requests.adapters import HTTPAdapter
+
+FMP_BASE_URL = os.environ.get("FMP_BASE_URL", "https://financialmodelingprep.com/api/v3")
+
+# Calls per minute allowed by the FMP plan (Starter plan = 300)
+FMP_CALLS_PER_MINUTE = int(os.environ.get("FMP_CALLS_PER_MINUTE", "300"))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting the rate of outgoing requests.
+    """
+
+    def __init__(self, calls_per_minute, burst=None):
+        """
+        Parameters:
+        calls_per_minute (float): Sustained number of calls allowed per minute
+        burst (int): Maximum number of calls that may be made back to back
+                     (default: one second worth of calls, at least 1)
+        """
+        self.rate = calls_per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1, int(self.rate))
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Block until a token is available and consume it
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+
+class RequestCoalescer:
+    """
+    Shares one in-flight call between concurrent callers asking for the same key.
+
+    The first caller (the leader) performs the call; callers arriving while it
+    is running wait for its result instead of issuing their own request.
+    Results are shared objects and must be treated as read-only.
+    """
+
+    def __init__(self):
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.coalesced_count = 0
+
+    def run(self, key, function):
+        """
+        Call function() unless an identical call is already running
+
+        Parameters:
+        key (hashable): Identity of the call
+        function (callable): Performs the call
+
+        Returns:
+        object: Result of the (possibly shared) call
+        """
+        with self.lock:
+            future = self.in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.in_flight[key] = future
+            else:
+                self.coalesced_count += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = function()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                self.in_flight.pop(key, None)
+
+
+class FmpClient:
+    """
+    Financial Modeling Prep API client shared by all fetch functions.
+
+    Uses one keep-alive connection pool (requests.Session), asks for gzip
+    compressed responses, paces calls with a token bucket matching the plan's
+    calls-per-minute and backs off on HTTP 429 / 5xx responses. Concurrent
+    identical JSON requests share a single in-flight call.
+    """
+
+    def __init__(self, api_key=None, base_url=None, calls_per_minute=None,
+                 pool_size=10, max_retries=5, backoff_base=1.0, timeout=30):
+        """
+        Parameters:
+        api_key (str): Default FMP API key (can be overridden per call)
+        base_url (str): API base URL (default: FMP_BASE_URL)
+        calls_per_minute (float): Plan limit (default: FMP_CALLS_PER_MINUTE)
+        pool_size (int): Number of keep-alive connections kept open
+        max_retries (int): Retries after a 429 / 5xx response or a connection error
+        backoff_base (float): First backoff delay in seconds, doubled on every retry
+        timeout (float): Request timeout in seconds
+        """
+        self.api_key = api_key
+        self.base_url = (base_url or FMP_BASE_URL).rstrip("/")
+        self.limiter = TokenBucket(calls_per_minute or FMP_CALLS_PER_MINUTE)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+        self.coalescer = RequestCoalescer()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate"})
+
+    def _backoff_delay(self, attempt, response=None):
+        # Honour the server's Retry-After header when present
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return float(retry_after)
+                except ValueError:
+                    pass
+        delay = self.backoff_base * (2 ** attempt)
+        return delay + random.uniform(0, delay / 2)
+
+    def request(self, path, params=None, api_key=None, stream=False):
+        """
+        Perform a rate-limited GET request with 429-aware retries
+
+        Parameters:
+        path (str): Endpoint path relative to the base URL, e.g. "income-statement/AAPL"
+        params (dict): Query parameters (apikey is added automatically)
+        api_key (str): FMP API key (default: the client's api_key)
+        stream (bool): Do not download the body up front
+
+        Returns:
+        requests.Response: The last response received, or None on connection errors
+        """
+        query = dict(params or {})
+        query["apikey"] = api_key or self.api_key
+        url = f"{self.base_url}/{path.lstrip('/')}"
+
+        response = None
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                response = self.session.get(url, params=query, timeout=self.timeout, stream=stream)
+            except requests.RequestException as e:
+                print(f"Error requesting {path}: {e}")
+                response = None
+                if attempt == self.max_retries:
+                    break
+                time.sleep(self._backoff_delay(attempt))
+                continue
+
+            if response.status_code != 429 and response.status_code < 500:
+                return response
+            if attempt == self.max_retries:
+                break
+            wait_time = self._backoff_delay(attempt, response)
+            print(f"{path}: HTTP {response.status_code}, retrying in {wait_time:.1f} seconds...")
+            response.close()
+            time.sleep(wait_time)
+
+        return response
+
+    def fetch_json(self, path, params=None, api_key=None):
+        """
+        Get a JSON document, sharing the call with identical concurrent requests
+
+        Parameters:
+        path (str): Endpoint path relative to the base URL
+        params (dict): Query parameters
+        api_key (str): FMP API key (default: the client's api_key)
+
+        Returns:
+        tuple: (status_code or None on connection errors, parsed JSON or None)
+        """
+        api_key = api_key or self.api_key
+        key = (path, tuple(sorted((params or {}).items())), api_key)
+
+        def fetch():
+            response = self.request(path, params, api_key)
+            if response is None:
+                return None, None
+            if response.status_code == 200:
+                return 200, response.json()
+            return response.status_code, None
+
+        return self.coalescer.run(key, fetch)
+
+    def get_json(self, path, params=None, api_key=None):
+        """
+        Get a JSON document from the FMP API
+
+        Parameters:
+        path (str): Endpoint path relative to the base URL
+        params (dict): Query parameters
+        api_key (str): FMP API key (default: the client's api_key)
+
+        Returns:
+        dict | list: Parsed JSON (shared with concurrent identical calls), or None on error
+        """
+        status, data = self.fetch_json(path, params, api_key)
+        if status != 200:
+            print(f"Error fetching {path}: {status if status is not None else 'connection error'}")
+            return None
+        return data
+
+    def close(self):
+        self.session.close()
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client():
+    """
+    Get the process-wide FMP client
+
+    Returns:
+    FmpClient: Shared client instance
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = FmpClient()
+        return _default_client
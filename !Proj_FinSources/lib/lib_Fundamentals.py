@@ -0,0 +1,201 @@
+import atexit
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from lib_PriceCache import DEFAULT_CACHE_DIR
+
+# Fundamentals only change with new filings; entries older than this are re-fetched
+FUNDAMENTALS_TTL = 24 * 60 * 60
+
+# Pickle file used when the cache is persisted
+FUNDAMENTALS_PATH = os.path.join(DEFAULT_CACHE_DIR, "fundamentals.pkl")
+
+
+def _is_empty(value):
+    # Empty answers are usually throttled requests and must not be cached
+    if value is None:
+        return True
+    if hasattr(value, 'empty'):
+        return bool(value.empty)
+    if isinstance(value, (dict, list, tuple)):
+        return len(value) == 0
+    return False
+
+
+class FundamentalsCache:
+    """
+    Per-ticker cache of fundamentals datasets (info, quarterly statements, ...).
+
+    Entries are kept in memory with least-recently-used eviction. Every
+    (ticker, dataset) pair is fetched at most once while it is cached, also
+    when several threads ask for it at the same time. With a path the cache
+    is persisted as a pickle file and survives between sessions; changes are
+    written every save_every changes and at close() or interpreter exit.
+    """
+
+    def __init__(self, max_tickers=256, path=None, ttl=FUNDAMENTALS_TTL, save_every=50):
+        """
+        Parameters:
+        max_tickers (int): Number of tickers kept before the least recently used is evicted
+        path (str): Pickle file persisting the cache, e.g. FUNDAMENTALS_PATH
+                    (default: in memory only)
+        ttl (int): Seconds after which a cached dataset is re-fetched (None: never)
+        save_every (int): Number of changes after which a persisted cache is written
+        """
+        self.max_tickers = max_tickers
+        self.path = path
+        self.ttl = ttl
+        self.save_every = save_every
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._key_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self._unsaved = 0
+        if path:
+            self._load()
+            atexit.register(self.save)
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                self.entries.update(pickle.load(f))
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            pass
+
+    def save(self):
+        """
+        Atomically write the cache to its pickle file (no-op when in memory only or unchanged)
+        """
+        # One writer at a time, so an older snapshot never replaces a newer one
+        with self._save_lock:
+            with self.lock:
+                if not self.path or not self._unsaved:
+                    return
+                snapshot = OrderedDict((ticker, dict(datasets)) for ticker, datasets in self.entries.items())
+                self._unsaved = 0
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+
+    def close(self):
+        """
+        Write pending changes of a persisted cache
+        """
+        self.save()
+
+    def _changed(self):
+        # Called with self.lock held; True when a persisted cache is due to be written
+        self._unsaved += 1
+        return bool(self.path) and self._unsaved >= self.save_every
+
+    def _key_lock(self, ticker, dataset):
+        # Locks live per ticker so they are evicted together with its entries
+        with self.lock:
+            return self._key_locks.setdefault(ticker, {}).setdefault(dataset, threading.Lock())
+
+    def _lookup(self, ticker, dataset):
+        with self.lock:
+            datasets = self.entries.get(ticker)
+            if datasets is None or dataset not in datasets:
+                return None
+            fetched_at, value = datasets[dataset]
+            if self.ttl is not None and time.time() - fetched_at > self.ttl:
+                return None
+            self.entries.move_to_end(ticker)
+            self.hits += 1
+            return (value,)
+
+    def put(self, ticker, dataset, value):
+        """
+        Store a dataset of a ticker
+
+        Parameters:
+        ticker (str): Stock ticker symbol
+        dataset (str): Dataset name, e.g. 'info' or 'quarterly_income_stmt'
+        value (object): Dataset (must be picklable when the cache is persisted)
+        """
+        ticker = ticker.upper()
+        with self.lock:
+            self.entries.setdefault(ticker, {})[dataset] = (time.time(), value)
+            self.entries.move_to_end(ticker)
+            while len(self.entries) > self.max_tickers:
+                evicted, _ = self.entries.popitem(last=False)
+                self._key_locks.pop(evicted, None)
+            due = self._changed()
+        if due:
+            self.save()
+
+    def get(self, ticker, dataset, fetch):
+        """
+        Get a dataset of a ticker, calling fetch() only when it is not cached
+
+        Parameters:
+        ticker (str): Stock ticker symbol
+        dataset (str): Dataset name, e.g. 'info' or 'quarterly_income_stmt'
+        fetch (callable): Downloads the dataset; None or empty results are not cached
+
+        Returns:
+        object: Cached or freshly fetched dataset
+        """
+        ticker = ticker.upper()
+        cached = self._lookup(ticker, dataset)
+        if cached is not None:
+            return cached[0]
+
+        # Callers asking for the same dataset wait for one fetch
+        with self._key_lock(ticker, dataset):
+            cached = self._lookup(ticker, dataset)
+            if cached is not None:
+                return cached[0]
+            with self.lock:
+                self.misses += 1
+            value = fetch()
+            if not _is_empty(value):
+                self.put(ticker, dataset, value)
+            return value
+
+    def invalidate(self, ticker, dataset=None):
+        """
+        Drop one dataset or all datasets of a ticker
+
+        Parameters:
+        ticker (str): Stock ticker symbol
+        dataset (str): Dataset to drop (default: all of the ticker's datasets)
+        """
+        ticker = ticker.upper()
+        with self.lock:
+            if dataset is None:
+                self.entries.pop(ticker, None)
+                self._key_locks.pop(ticker, None)
+            else:
+                self.entries.get(ticker, {}).pop(dataset, None)
+            due = self._changed()
+        if due:
+            self.save()
+
+
+_default_fundamentals = None
+_default_fundamentals_lock = threading.Lock()
+
+
+def get_default_fundamentals():
+    """
+    Get the process-wide in-memory fundamentals cache
+
+    Returns:
+    FundamentalsCache: Shared cache instance
+    """
+    global _default_fundamentals
+    with _default_fundamentals_lock:
+        if _default_fundamentals is None:
+            _default_fundamentals = FundamentalsCache()
+        return _default_fundamentals
@@ -0,0 +1,171 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import lib_ChartRender
+import lib_ResultSink
+
+
+def period_label(year_from, year_to):
+    """
+    Returns:
+    int | str: The year, or "year_from-year_to" for a span
+    """
+    return year_from if year_from == year_to else f"{year_from}-{year_to}"
+
+
+def iter_computed(tickers, compute, max_workers=4):
+    """
+    Run compute(ticker) for many tickers in a thread pool, yielding each result as it completes
+
+    Parameters:
+    tickers (list): Stock ticker symbols
+    compute (callable): compute(ticker) returning a pd.DataFrame with quarterly P/E ratios
+    max_workers (int): Maximum number of tickers processed at the same time
+
+    Yields:
+    tuple: (ticker, pd.DataFrame, None when computing failed)
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(compute, ticker): ticker for ticker in tickers}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                quarterly_pe = future.result()
+            except Exception as e:
+                # One broken ticker must not end the whole batch
+                print(f"{ticker}: failed: {e}")
+                quarterly_pe = None
+            yield ticker, quarterly_pe
+
+
+def run_batch(tickers, compute, year_from, year_to, out_path, chart_dir=None, max_workers=4, resume=True,
+              prepare=None):
+    """
+    Compute quarterly P/E ratios of many tickers without any user interaction
+
+    Results are appended to out_path as each ticker completes, so an
+    interrupted run keeps its progress and a rerun only computes the
+    tickers that are still missing.
+
+    Parameters:
+    tickers (list): Stock ticker symbols
+    compute (callable): compute(ticker) returning a pd.DataFrame with the quarterly P/E ratios of the span
+    year_from (int): First year of the span (used for messages and chart titles)
+    year_to (int): Last year of the span
+    out_path (str): Results file, JSON lines or CSV (see lib_ResultSink)
+    chart_dir (str): Directory for headless PNG charts (default: no charts)
+    max_workers (int): Maximum number of tickers processed at the same time
+    resume (bool): Skip tickers already in out_path (False: overwrite it)
+    prepare (callable): prepare(pending) called once with the tickers still to compute,
+                        before any compute(ticker), e.g. for a batched download
+
+    Returns:
+    int: Number of tickers written in this run
+    """
+    label = period_label(year_from, year_to)
+    written = 0
+    failed = []
+
+    with lib_ResultSink.ResultSink(out_path, resume) as sink:
+        done = sink.completed()
+        pending = [ticker for ticker in tickers if ticker not in done]
+        print(f"{len(tickers) - len(pending)} tickers already in {out_path}, {len(pending)} to compute")
+        if prepare is not None and pending:
+            prepare(pending)
+
+        renderer = lib_ChartRender.ChartRenderer() if chart_dir else None
+        try:
+            for ticker, quarterly_pe in iter_computed(pending, compute, max_workers):
+                if quarterly_pe is None:
+                    failed.append(ticker)
+                    continue
+                if quarterly_pe.empty:
+                    print(f"{ticker}: no P/E data for {label}")
+                    continue
+                sink.write(ticker, quarterly_pe)
+                written += 1
+                print(f"{ticker}: {len(quarterly_pe)} quarters written to {out_path}")
+                if renderer is not None:
+                    renderer.submit('pe', lib_ChartRender.pe_chart_path(ticker, label, chart_dir),
+                                    quarterly_pe=quarterly_pe, ticker=ticker, period_label=label)
+        finally:
+            if renderer is not None:
+                renderer.wait()
+                renderer.close()
+
+    if failed:
+        print(f"{len(failed)} tickers failed and will be retried by the next run: {', '.join(failed)}")
+    return written
+
+
+def build_parser(description):
+    """
+    Command line parser with the options shared by the P/E batch scripts
+
+    Scripts add their own options before calling parse_args.
+
+    Parameters:
+    description (str): Help text of the script
+
+    Returns:
+    argparse.ArgumentParser: Parser with tickers, --tickers-file, --year-from/--year-to,
+    --out, --no-resume, --charts and --workers
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('tickers', nargs='*', help='Stock ticker symbol(s)')
+    parser.add_argument('--tickers-file', help='File with ticker symbols, one per line')
+    parser.add_argument('--year-from', type=int, default=2010, help='First year to analyze (default: 2010)')
+    parser.add_argument('--year-to', type=int, help='Last year to analyze (default: --year-from)')
+    parser.add_argument('--out', default='pe_ratios.jsonl', help='Results file, .jsonl or .csv (default: pe_ratios.jsonl)')
+    parser.add_argument('--no-resume', action='store_true', help='Overwrite --out instead of skipping tickers already in it')
+    parser.add_argument('--charts', metavar='DIR', help='Also render PNG charts headlessly into DIR')
+    parser.add_argument('--workers', type=int, default=4, help='Tickers processed at the same time (default: 4)')
+    return parser
+
+
+def parse_args(parser, argv=None):
+    """
+    Parse and check the command line of a P/E batch script
+
+    Parameters:
+    parser (argparse.ArgumentParser): Parser from build_parser
+    argv (list): Arguments (default: sys.argv[1:])
+
+    Returns:
+    argparse.Namespace: Arguments, year_to defaults to year_from
+    """
+    args = parser.parse_args(argv)
+    if args.year_to is None:
+        args.year_to = args.year_from
+    if args.year_to < args.year_from:
+        parser.error('--year-to must not be before --year-from')
+    return args
+
+
+def is_batch(args):
+    """
+    Returns:
+    bool: True when tickers were given on the command line or in a file
+    """
+    return bool(args.tickers or args.tickers_file)
+
+
+def read_tickers(args):
+    """
+    Collect the tickers of a batch run from the command line and --tickers-file
+
+    Parameters:
+    args (argparse.Namespace): Arguments from parse_args
+
+    Returns:
+    list: Upper-case ticker symbols, command line first, without duplicates
+    """
+    tickers = []
+    for ticker in args.tickers:
+        if ticker.upper() not in tickers:
+            tickers.append(ticker.upper())
+    if args.tickers_file:
+        tickers += [ticker for ticker in lib_ResultSink.read_ticker_file(args.tickers_file) if ticker not in tickers]
+        if not tickers:
+            print(f"No tickers found in {args.tickers_file}")
+    return tickers
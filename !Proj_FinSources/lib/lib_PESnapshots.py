@@ -0,0 +1,199 @@
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from lib_PriceCache import DEFAULT_CACHE_DIR
+from lib_QuarterlyPE import PE_COLUMNS
+
+DEFAULT_SNAPSHOT_PATH = os.path.join(DEFAULT_CACHE_DIR, "pe_snapshots.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pe_years (
+    source TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (source, ticker, year)
+);
+CREATE TABLE IF NOT EXISTS pe_quarters (
+    source TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    quarter TEXT,
+    date TEXT NOT NULL,
+    price REAL,
+    eps REAL,
+    pe_ratio REAL,
+    input_hash TEXT,
+    PRIMARY KEY (source, ticker, year, date)
+);
+"""
+
+
+class PESnapshotStore:
+    """
+    SQLite store of successfully computed quarterly P/E rows.
+
+    Every (ticker, year) computed by a pipeline is saved as a snapshot and can
+    be answered from disk in milliseconds, either because the year is already
+    known or because the upstream source is failing. Rows are kept per source
+    (e.g. 'yahoo', 'fmp') since the pipelines resolve prices differently.
+    """
+
+    def __init__(self, path=None, source='default'):
+        """
+        Parameters:
+        path (str): SQLite database file (default: DEFAULT_SNAPSHOT_PATH)
+        source (str): Pipeline the snapshots belong to
+        """
+        self.path = path or DEFAULT_SNAPSHOT_PATH
+        self.source = source
+        self.lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connect()
+        try:
+            connection.executescript(_SCHEMA)
+            # Stores created before input hashes were kept
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(pe_quarters)")]
+            if 'input_hash' not in columns:
+                connection.execute("ALTER TABLE pe_quarters ADD COLUMN input_hash TEXT")
+                connection.commit()
+        finally:
+            connection.close()
+
+    def _connect(self):
+        # One short-lived connection per operation keeps the store usable from any thread
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def save(self, ticker, year, quarterly_pe):
+        """
+        Replace the snapshot of a ticker's year
+
+        Parameters:
+        ticker (str): Stock ticker symbol
+        year (int): Year the rows belong to
+        quarterly_pe (pd.DataFrame): Quarterly P/E rows (PE_COLUMNS)
+        """
+        ticker = ticker.upper()
+        rows = [
+            (self.source, ticker, int(year), position, row['Quarter'], str(row['Date'])[:10],
+             float(row['Price']), float(row['EPS']), float(row['P/E Ratio']))
+            for position, row in enumerate(quarterly_pe[PE_COLUMNS].to_dict('records'))
+        ]
+        with self.lock:
+            connection = self._connect()
+            try:
+                with connection:
+                    connection.execute("DELETE FROM pe_quarters WHERE source = ? AND ticker = ? AND year = ?",
+                                       (self.source, ticker, int(year)))
+                    connection.executemany(
+                        "INSERT INTO pe_quarters (source, ticker, year, position, quarter, date, price, eps, pe_ratio) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                    connection.execute("INSERT OR REPLACE INTO pe_years VALUES (?, ?, ?, ?)",
+                                       (self.source, ticker, int(year), time.time()))
+            finally:
+                connection.close()
+
+    def load(self, ticker, year, max_age=None):
+        """
+        Get the snapshot of a ticker's year
+
+        Parameters:
+        ticker (str): Stock ticker symbol
+        year (int): Year to load
+        max_age (float): Ignore snapshots older than this many seconds (default: any age)
+
+        Returns:
+        pd.DataFrame: Quarterly P/E rows in the order they were saved (empty when unknown)
+        """
+        ticker = ticker.upper()
+        connection = self._connect()
+        try:
+            known = connection.execute(
+                "SELECT updated_at FROM pe_years WHERE source = ? AND ticker = ? AND year = ?",
+                (self.source, ticker, int(year))).fetchone()
+            if known is None or (max_age is not None and time.time() - known[0] > max_age):
+                return pd.DataFrame()
+            rows = connection.execute(
+                "SELECT quarter, date, price, eps, pe_ratio FROM pe_quarters "
+                "WHERE source = ? AND ticker = ? AND year = ? ORDER BY position, date",
+                (self.source, ticker, int(year))).fetchall()
+        finally:
+            connection.close()
+        return pd.DataFrame(rows, columns=PE_COLUMNS)
+
+    def upsert_quarters(self, ticker, quarterly_pe, input_hashes, years=()):
+        """
+        Insert or replace single quarters together with the hash of their inputs
+
+        Parameters:
+        ticker (str): Stock ticker symbol
+        quarterly_pe (pd.DataFrame): Quarterly P/E rows (PE_COLUMNS) to store
+        input_hashes (list): Input hash of each row (see lib_QuarterlyPE.input_hashes)
+        years (iterable): Years that are now completely computed and can be served by load()
+        """
+        ticker = ticker.upper()
+        rows = [
+            (self.source, ticker, int(str(row['Date'])[:4]), 0, row['Quarter'], str(row['Date'])[:10],
+             float(row['Price']), float(row['EPS']), float(row['P/E Ratio']), input_hash)
+            for row, input_hash in zip(quarterly_pe[PE_COLUMNS].to_dict('records'), input_hashes)
+        ]
+        now = time.time()
+        with self.lock:
+            connection = self._connect()
+            try:
+                with connection:
+                    connection.executemany("INSERT OR REPLACE INTO pe_quarters VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                           rows)
+                    connection.executemany("INSERT OR REPLACE INTO pe_years VALUES (?, ?, ?, ?)",
+                                           [(self.source, ticker, int(year), now) for year in years])
+            finally:
+                connection.close()
+
+    def quarters(self, ticker, year_from=None, year_to=None):
+        """
+        Get all stored quarters of a ticker with their input hashes
+
+        Parameters:
+        ticker (str): Stock ticker symbol
+        year_from (int): First year to include (default: no lower bound)
+        year_to (int): Last year to include (default: no upper bound)
+
+        Returns:
+        pd.DataFrame: PE_COLUMNS and 'Input Hash', sorted by date
+        """
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                "SELECT quarter, date, price, eps, pe_ratio, input_hash FROM pe_quarters "
+                "WHERE source = ? AND ticker = ? AND year >= ? AND year <= ? ORDER BY date",
+                (self.source, ticker.upper(),
+                 year_from if year_from is not None else -1,
+                 year_to if year_to is not None else 9999)).fetchall()
+        finally:
+            connection.close()
+        return pd.DataFrame(rows, columns=PE_COLUMNS + ['Input Hash'])
+
+    def years(self, ticker):
+        """
+        Parameters:
+        ticker (str): Stock ticker symbol
+
+        Returns:
+        list: Years with a snapshot for the ticker, ascending
+        """
+        connection = self._connect()
+        try:
+            rows = connection.execute("SELECT year FROM pe_years WHERE source = ? AND ticker = ? ORDER BY year",
+                                      (self.source, ticker.upper())).fetchall()
+        finally:
+            connection.close()
+        return [row[0] for row in rows]
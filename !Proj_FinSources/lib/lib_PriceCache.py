@@ -0,0 +1,227 @@
+import json
+import os
+import threading
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+import lib_PriceStore
+
+# Cache location can be overridden with the FINSOURCES_CACHE_DIR environment variable
+DEFAULT_CACHE_DIR = os.environ.get(
+    "FINSOURCES_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "finsources"),
+)
+
+# How long (in seconds) the most recent bar is trusted before it is re-fetched.
+# The latest bar may still be an intraday/partial value, older bars never change.
+LATEST_BAR_TTL = 6 * 60 * 60
+
+# Bars older than this many days are treated as final and never re-fetched
+LATEST_BAR_WINDOW_DAYS = 5
+
+
+def _to_date(value):
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+class PriceCache:
+    """
+    Persistent per-ticker cache of FMP historical-price-full bars.
+
+    The bars are kept in the columnar price store (see lib_PriceStore),
+    whose metadata also records the date range that has already been
+    downloaded. A request only fetches the missing head (before the cached
+    range) and/or tail (after it); everything else is read from the
+    memory-mapped store.
+    """
+
+    def __init__(self, store=None, latest_bar_ttl=LATEST_BAR_TTL, cache_dir=None):
+        """
+        Parameters:
+        store (PriceStore): Store holding the bars (default: the shared "fmp" store)
+        latest_bar_ttl (int): Seconds after which the latest cached bar is re-fetched
+        cache_dir (str): Directory of the JSON cache files of earlier versions, moved into
+                         the store on first use (default: DEFAULT_CACHE_DIR/prices)
+        """
+        self.store = store or lib_PriceStore.get_default_store("fmp")
+        self.latest_bar_ttl = latest_bar_ttl
+        self.cache_dir = cache_dir or os.path.join(DEFAULT_CACHE_DIR, "prices")
+        self._ticker_locks = {}
+        self._locks_lock = threading.Lock()
+
+    def _lock(self, ticker):
+        with self._locks_lock:
+            return self._ticker_locks.setdefault(ticker.upper(), threading.Lock())
+
+    def _path(self, ticker):
+        safe_ticker = ticker.upper().replace("/", "_").replace("\\", "_")
+        return os.path.join(self.cache_dir, f"{safe_ticker}.json")
+
+    def load(self, ticker):
+        """
+        Load the downloaded date range of a ticker
+
+        Parameters:
+        ticker (str): Stock ticker symbol
+
+        Returns:
+        dict: Store metadata with the cached range ('from', 'to', 'fetched_at') or None
+        """
+        meta = self.store.meta(ticker)
+        if meta is not None and "from" in meta:
+            return meta
+        return self._migrate(ticker)
+
+    def _migrate(self, ticker):
+        # A JSON cache file of an earlier version becomes the ticker's stored bars
+        try:
+            with open(self._path(ticker), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            coverage = {key: entry[key] for key in ("from", "to", "fetched_at")}
+        except (OSError, ValueError, KeyError):
+            return None
+        self.store.write_fmp(ticker, entry.get("historical", []), merge=False, meta=coverage)
+        self._remove_legacy(ticker)
+        return self.store.meta(ticker)
+
+    def _remove_legacy(self, ticker):
+        try:
+            os.remove(self._path(ticker))
+        except FileNotFoundError:
+            pass
+
+    def invalidate(self, ticker):
+        """
+        Remove the cached bars of a ticker
+
+        Parameters:
+        ticker (str): Stock ticker symbol
+        """
+        with self._lock(ticker):
+            self.store.delete(ticker)
+            self._remove_legacy(ticker)
+
+    def get(self, ticker, from_date, to_date, fetch):
+        """
+        Get historical bars, downloading only the ranges missing from the cache
+
+        Parameters:
+        ticker (str): Stock ticker symbol
+        from_date (str): Start date in YYYY-MM-DD format
+        to_date (str): End date in YYYY-MM-DD format
+        fetch (callable): fetch(from_date, to_date) returning a list of bars,
+                          or None when the download failed
+
+        Returns:
+        list: Bars ('date', 'open', 'high', 'low', 'close', 'volume') within the
+              requested range, newest first (as FMP returns them), or None when a
+              required download failed
+        """
+        start = _to_date(from_date)
+        end = _to_date(to_date)
+        # Concurrent requests for a ticker wait for the first one and are then
+        # served from what it downloaded instead of downloading again
+        with self._lock(ticker):
+            if not self._update(ticker, start, end, fetch):
+                return None
+            return self._select(ticker, start, end)
+
+    def get_series(self, ticker, from_date, to_date, fetch, column="close"):
+        """
+        Get historical prices as a PriceSeries, downloading only the ranges missing from the cache
+
+        The series is read straight from the store's columns, without building
+        a dictionary per bar.
+
+        Parameters:
+        ticker (str): Stock ticker symbol
+        from_date (str): Start date in YYYY-MM-DD format
+        to_date (str): End date in YYYY-MM-DD format
+        fetch (callable): fetch(from_date, to_date), see get()
+        column (str): Price column to use
+
+        Returns:
+        PriceSeries: Prices within the requested range, or None when a required download failed
+        """
+        start = _to_date(from_date)
+        end = _to_date(to_date)
+        with self._lock(ticker):
+            if not self._update(ticker, start, end, fetch):
+                return None
+            return self.store.price_series(ticker, start.isoformat(), end.isoformat(), column)
+
+    def _update(self, ticker, start, end, fetch):
+        today = date.today()
+        # Bars after today cannot exist yet, so never mark them as covered
+        covered_end = min(end, today)
+
+        entry = self.load(ticker)
+        if entry is None:
+            bars = fetch(start.isoformat(), end.isoformat())
+            if bars is None:
+                return False
+            coverage = {"from": start.isoformat(), "to": covered_end.isoformat(), "fetched_at": time.time()}
+            self.store.write_fmp(ticker, bars, merge=False, meta=coverage)
+            return True
+
+        cached_from = _to_date(entry["from"])
+        cached_to = _to_date(entry["to"])
+        bars = []
+        coverage = {}
+
+        # Missing head
+        if start < cached_from:
+            head = fetch(start.isoformat(), (cached_from - timedelta(days=1)).isoformat())
+            if head is None:
+                return False
+            bars += head
+            coverage["from"] = start.isoformat()
+
+        # Missing tail, or a latest bar that is older than the TTL
+        tail_start = None
+        if covered_end > cached_to:
+            tail_start = cached_to + timedelta(days=1)
+        stale = time.time() - entry.get("fetched_at", 0) > self.latest_bar_ttl
+        if stale and entry.get("last") is not None:
+            latest_bar_date = _to_date(entry["last"])
+            # Only a bar close to today can still change
+            if latest_bar_date >= today - timedelta(days=LATEST_BAR_WINDOW_DAYS) and end >= latest_bar_date:
+                tail_start = latest_bar_date
+        if tail_start is not None:
+            tail = fetch(tail_start.isoformat(), end.isoformat())
+            if tail is None:
+                return False
+            bars += tail
+            coverage["to"] = max(cached_to, covered_end).isoformat()
+            coverage["fetched_at"] = time.time()
+
+        if coverage:
+            self.store.write_fmp(ticker, bars, merge=True, meta=coverage)
+        return True
+
+    def _select(self, ticker, start, end):
+        columns = self.store.read(ticker, start.isoformat(), end.isoformat())
+        if columns is None:
+            return []
+        names = ["date"] + lib_PriceStore.PRICE_COLUMNS
+        rows = zip(np.datetime_as_string(columns["date"][::-1]).tolist(),
+                   *(columns[name][::-1].tolist() for name in lib_PriceStore.PRICE_COLUMNS))
+        return [dict(zip(names, row)) for row in rows]
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """
+    Get the process-wide price cache
+
+    Returns:
+    PriceCache: Shared cache instance
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = PriceCache()
+    return _default_cache
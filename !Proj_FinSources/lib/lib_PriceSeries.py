@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+NEAREST = "nearest"
+PREVIOUS = "previous"
+
+
+def _to_datetime64(dates):
+    return np.asarray(pd.to_datetime(pd.Series(dates)).dt.normalize().values, dtype="datetime64[D]")
+
+
+class PriceSeries:
+    """
+    Sorted, datetime64-indexed closing prices of one ticker.
+
+    Built once per ticker; any number of target dates can then be resolved in
+    one vectorized binary search instead of scanning the whole history per date.
+    """
+
+    def __init__(self, dates, closes):
+        """
+        Parameters:
+        dates (array-like): Trading dates (datetime64, Timestamps or YYYY-MM-DD strings)
+        closes (array-like): Closing prices matching dates
+        """
+        dates = np.asarray(dates)
+        if dates.dtype.kind != "M":
+            dates = _to_datetime64(dates) if len(dates) else np.array([], dtype="datetime64[D]")
+        dates = dates.astype("datetime64[D]")
+        closes = np.asarray(closes, dtype=float)
+
+        order = np.argsort(dates, kind="stable")
+        self.dates = dates[order]
+        self.closes = closes[order]
+
+    @classmethod
+    def from_fmp(cls, price_data, field="close"):
+        """
+        Build a series from FMP historical-price-full bars
+
+        Parameters:
+        price_data (list): List of price data dictionaries (get_historical_price)
+        field (str): Price field to use
+
+        Returns:
+        PriceSeries: Sorted price series
+        """
+        dates = np.array([bar["date"][:10] for bar in price_data], dtype="datetime64[D]")
+        closes = np.array([bar[field] for bar in price_data], dtype=float)
+        return cls(dates, closes)
+
+    @classmethod
+    def from_frame(cls, frame, column="Close"):
+        """
+        Build a series from a DataFrame with a DatetimeIndex (e.g. yfinance history())
+
+        Parameters:
+        frame (pd.DataFrame): Price history
+        column (str): Price column to use
+
+        Returns:
+        PriceSeries: Sorted price series
+        """
+        index = pd.DatetimeIndex(frame.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        return cls(index.normalize().values.astype("datetime64[D]"), frame[column].to_numpy(dtype=float))
+
+    def __len__(self):
+        return len(self.dates)
+
+    def resolve(self, target_dates, method=NEAREST):
+        """
+        Find the position of the price used for each target date
+
+        Parameters:
+        target_dates (array-like): Dates to resolve
+        method (str): NEAREST - closest trading day (ties go to the later day)
+                      PREVIOUS - last trading day on or before the target date
+
+        Returns:
+        np.ndarray: Positions into dates/closes, -1 where no price is available
+        """
+        targets = np.asarray(target_dates)
+        if targets.dtype.kind != "M":
+            targets = _to_datetime64(targets)
+        targets = targets.astype("datetime64[D]")
+
+        if len(self.dates) == 0:
+            return np.full(len(targets), -1)
+
+        # Position of the first trading day after each target
+        after = np.searchsorted(self.dates, targets, side="right")
+        previous = after - 1
+
+        if method == PREVIOUS:
+            return previous
+        if method != NEAREST:
+            raise ValueError(f"Unknown lookup method: {method}")
+
+        last = len(self.dates) - 1
+        prev_idx = np.clip(previous, 0, last)
+        next_idx = np.clip(after, 0, last)
+        prev_diff = np.abs((targets - self.dates[prev_idx]).astype(np.int64))
+        next_diff = np.abs((self.dates[next_idx] - targets).astype(np.int64))
+        use_next = (previous < 0) | ((after <= last) & (next_diff <= prev_diff))
+        return np.where(use_next, next_idx, prev_idx)
+
+    def lookup(self, target_dates, method=NEAREST):
+        """
+        Get the closing price for each target date
+
+        Parameters:
+        target_dates (array-like): Dates to resolve
+        method (str): NEAREST or PREVIOUS, see resolve()
+
+        Returns:
+        np.ndarray: Closing prices, NaN where no price is available
+        """
+        positions = self.resolve(target_dates, method)
+        found = positions >= 0
+        prices = np.full(len(positions), np.nan)
+        prices[found] = self.closes[positions[found]]
+        return prices
@@ -0,0 +1,297 @@
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# lib_PriceCache keeps its bars in this store, so only its module is imported here
+import lib_PriceCache
+from lib_PriceSeries import PriceSeries
+
+# Fixed-width columns stored for every ticker, one .npy file each
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# yfinance history() column names for the stored columns
+FRAME_COLUMNS = {'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}
+
+# Metadata kept up to date by the store itself, everything else in meta.json belongs to the caller
+STORE_META = ('rows', 'first', 'last', 'updated_at')
+
+
+def _as_day(value):
+    return np.datetime64(pd.Timestamp(value).date(), 'D')
+
+
+class PriceStore:
+    """
+    Local columnar store of daily price bars.
+
+    Every ticker is a directory with one fixed-width .npy file per column
+    (date as datetime64[D], open/high/low/close/volume as float64). Reading
+    opens the files memory-mapped, so slicing a date range costs a binary
+    search on the date column and touches only the pages actually used.
+
+    On Windows a file cannot be replaced while it is memory-mapped, so drop
+    slices returned by read() before writing the ticker again; the other
+    readers return copies.
+    """
+
+    def __init__(self, root=None, source="fmp"):
+        """
+        Parameters:
+        root (str): Store directory (default: DEFAULT_CACHE_DIR/store/<source>)
+        source (str): Price source, each source is stored separately as their prices differ
+        """
+        self.root = root or os.path.join(lib_PriceCache.DEFAULT_CACHE_DIR, "store", source)
+        self._ticker_locks = {}
+        self._locks_lock = threading.Lock()
+
+    def lock(self, ticker):
+        """
+        Parameters:
+        ticker (str): Stock ticker symbol
+
+        Returns:
+        threading.RLock: Lock held while the ticker is read or written in this process
+        """
+        with self._locks_lock:
+            return self._ticker_locks.setdefault(ticker.upper(), threading.RLock())
+
+    def _ticker_dir(self, ticker):
+        safe_ticker = ticker.upper().replace("/", "_").replace("\\", "_")
+        return os.path.join(self.root, safe_ticker)
+
+    def tickers(self):
+        """
+        Returns:
+        list: Tickers present in the store
+        """
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, name, "meta.json")))
+
+    def has(self, ticker):
+        return os.path.exists(os.path.join(self._ticker_dir(ticker), "meta.json"))
+
+    def meta(self, ticker):
+        """
+        Parameters:
+        ticker (str): Stock ticker symbol
+
+        Returns:
+        dict: Store metadata ('rows', 'first', 'last', 'updated_at', plus the
+              caller's fields given to write/merge) or None
+        """
+        try:
+            with open(os.path.join(self._ticker_dir(ticker), "meta.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write(self, ticker, columns, meta=None):
+        """
+        Replace the stored bars of a ticker
+
+        Parameters:
+        ticker (str): Stock ticker symbol
+        columns (dict): 'date' plus PRICE_COLUMNS arrays of equal length
+        meta (dict): Further fields stored in the metadata, e.g. the downloaded date range
+        """
+        with self.lock(ticker):
+            self._write(ticker, columns, meta or {})
+
+    def _write(self, ticker, columns, extra):
+        dates = np.asarray(columns['date']).astype('datetime64[D]')
+        order = np.argsort(dates, kind='stable')
+        dates = dates[order]
+        # Keep the last bar of duplicated dates
+        keep = np.append(dates[1:] != dates[:-1], True) if len(dates) else np.array([], dtype=bool)
+
+        ticker_dir = self._ticker_dir(ticker)
+        os.makedirs(ticker_dir, exist_ok=True)
+        suffix = f"{os.getpid()}.{threading.get_ident()}.tmp"
+
+        arrays = {'date': dates[keep]}
+        for name in PRICE_COLUMNS:
+            values = columns.get(name)
+            values = np.full(len(order), np.nan) if values is None else np.asarray(values, dtype=np.float64)
+            arrays[name] = values[order][keep]
+
+        for name, values in arrays.items():
+            path = os.path.join(ticker_dir, f"{name}.npy")
+            tmp_path = f"{path}.{suffix}"
+            with open(tmp_path, "wb") as f:
+                np.save(f, values)
+            os.replace(tmp_path, path)
+
+        meta = dict(extra)
+        meta.update({
+            'rows': int(len(arrays['date'])),
+            'first': str(arrays['date'][0]) if len(arrays['date']) else None,
+            'last': str(arrays['date'][-1]) if len(arrays['date']) else None,
+            'updated_at': time.time(),
+        })
+        meta_path = os.path.join(ticker_dir, "meta.json")
+        with open(f"{meta_path}.{suffix}", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(f"{meta_path}.{suffix}", meta_path)
+
+    def merge(self, ticker, columns, meta=None):
+        """
+        Add bars to a ticker, new bars replacing stored bars of the same date
+
+        Parameters:
+        ticker (str): Stock ticker symbol
+        columns (dict): 'date' plus PRICE_COLUMNS arrays of equal length
+        meta (dict): Metadata fields to set, the other stored fields are kept
+        """
+        with self.lock(ticker):
+            stored_meta = self.meta(ticker)
+            if stored_meta is None:
+                self._write(ticker, columns, meta or {})
+                return
+            extra = {key: value for key, value in stored_meta.items() if key not in STORE_META}
+            extra.update(meta or {})
+            existing = self.read(ticker)
+            combined = {name: np.concatenate([np.asarray(existing[name]),
+                                              np.asarray(columns.get(name, np.full(len(columns['date']), np.nan)))])
+                        for name in ['date'] + PRICE_COLUMNS}
+            combined['date'] = combined['date'].astype('datetime64[D]')
+            # concatenate copied the bars, release the memory-mapped files before they are replaced
+            existing = None
+            self._write(ticker, combined, extra)
+
+    def delete(self, ticker):
+        """
+        Remove all stored bars of a ticker
+
+        Parameters:
+        ticker (str): Stock ticker symbol
+        """
+        with self.lock(ticker):
+            shutil.rmtree(self._ticker_dir(ticker), ignore_errors=True)
+
+    def write_fmp(self, ticker, price_data, merge=True, meta=None):
+        """
+        Store FMP historical-price-full bars (as returned by get_historical_price)
+
+        Parameters:
+        ticker (str): Stock ticker symbol
+        price_data (list): List of price data dictionaries
+        merge (bool): Merge with the stored bars instead of replacing them
+        meta (dict): Further metadata fields, see write()
+        """
+        columns = {'date': np.array([bar['date'][:10] for bar in price_data], dtype='datetime64[D]')}
+        for name in PRICE_COLUMNS:
+            columns[name] = np.array([bar.get(name, np.nan) for bar in price_data], dtype=np.float64)
+        (self.merge if merge else self.write)(ticker, columns, meta)
+
+    def write_frame(self, ticker, frame, merge=True, meta=None):
+        """
+        Store a price DataFrame with a DatetimeIndex (e.g. yfinance history())
+
+        Parameters:
+        ticker (str): Stock ticker symbol
+        frame (pd.DataFrame): Price history with Open/High/Low/Close/Volume columns
+        merge (bool): Merge with the stored bars instead of replacing them
+        meta (dict): Further metadata fields, see write()
+        """
+        index = pd.DatetimeIndex(frame.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        columns = {'date': index.normalize().values.astype('datetime64[D]')}
+        for name, frame_column in FRAME_COLUMNS.items():
+            if frame_column in frame.columns:
+                columns[name] = frame[frame_column].to_numpy(dtype=np.float64)
+        (self.merge if merge else self.write)(ticker, columns, meta)
+
+    def read(self, ticker, start=None, end=None):
+        """
+        Read a date range of a ticker without parsing or loading whole files
+
+        Parameters:
+        ticker (str): Stock ticker symbol
+        start (str): First date to include (default: first stored bar)
+        end (str): Last date to include (default: last stored bar)
+
+        Returns:
+        dict: 'date' plus PRICE_COLUMNS arrays (read-only memory-mapped views),
+              or None when the ticker is not stored
+        """
+        # All columns of one write, not some of the next one
+        with self.lock(ticker):
+            if not self.has(ticker):
+                return None
+            ticker_dir = self._ticker_dir(ticker)
+            dates = np.load(os.path.join(ticker_dir, "date.npy"), mmap_mode='r')
+
+            lo = 0 if start is None else int(np.searchsorted(dates, _as_day(start), side='left'))
+            hi = len(dates) if end is None else int(np.searchsorted(dates, _as_day(end), side='right'))
+
+            result = {'date': dates[lo:hi]}
+            for name in PRICE_COLUMNS:
+                result[name] = np.load(os.path.join(ticker_dir, f"{name}.npy"), mmap_mode='r')[lo:hi]
+            return result
+
+    def read_frame(self, ticker, start=None, end=None):
+        """
+        Read a date range as a DataFrame shaped like yfinance history()
+
+        Parameters:
+        ticker (str): Stock ticker symbol
+        start (str): First date to include
+        end (str): Last date to include
+
+        Returns:
+        pd.DataFrame: Open/High/Low/Close/Volume with a DatetimeIndex (empty if not stored)
+        """
+        columns = self.read(ticker, start, end)
+        if columns is None:
+            return pd.DataFrame(columns=list(FRAME_COLUMNS.values()))
+        # Copies, so the frame does not keep the files memory-mapped
+        return pd.DataFrame(
+            {FRAME_COLUMNS[name]: np.array(columns[name]) for name in PRICE_COLUMNS},
+            index=pd.DatetimeIndex(np.array(columns['date']), name='Date'),
+        )
+
+    def price_series(self, ticker, start=None, end=None, column='close'):
+        """
+        Read a date range as a PriceSeries for as-of lookups
+
+        Parameters:
+        ticker (str): Stock ticker symbol
+        start (str): First date to include
+        end (str): Last date to include
+        column (str): Price column to use
+
+        Returns:
+        PriceSeries: Price series holding a copy of the range (empty if not stored)
+        """
+        columns = self.read(ticker, start, end)
+        if columns is None:
+            return PriceSeries(np.array([], dtype='datetime64[D]'), [])
+        return PriceSeries(columns['date'], columns[column])
+
+
+_default_stores = {}
+_default_stores_lock = threading.Lock()
+
+
+def get_default_store(source="fmp"):
+    """
+    Get the process-wide price store of a price source
+
+    Parameters:
+    source (str): Price source, "fmp" (lib_PriceCache) or "yahoo" (the stock viewers)
+
+    Returns:
+    PriceStore: Shared store instance
+    """
+    with _default_stores_lock:
+        if source not in _default_stores:
+            _default_stores[source] = PriceStore(source=source)
+        return _default_stores[source]
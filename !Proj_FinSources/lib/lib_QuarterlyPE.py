@@ -0,0 +1,253 @@
+import numpy as np
+import pandas as pd
+
+import lib_FInSources
+from lib_PriceSeries import PriceSeries, NEAREST
+
+PE_COLUMNS = ['Quarter', 'Date', 'Price', 'EPS', 'P/E Ratio']
+
+# Already stored quarters downloaded again on every incremental update, to catch restatements
+RECHECK_QUARTERS = 4
+
+
+def _statement_frame(data, columns):
+    frame = pd.DataFrame(data)
+    if frame.empty:
+        return pd.DataFrame(columns=['date'] + columns)
+    # Keep the first report of a quarter, like the per-quarter lookup did
+    frame = frame.reindex(columns=['date'] + columns).drop_duplicates('date', keep='first')
+    frame['date'] = frame['date'].str[:10]
+    return frame
+
+
+def quarter_inputs(income_data, balance_data, price_data, year_from=None, year_to=None, method=NEAREST):
+    """
+    Collect the inputs of every quarter's P/E (net income, shares, price) in one pass
+
+    Income statements and balance sheets are joined on the report date and all
+    quarter-end prices are resolved with a single as-of lookup.
+
+    Parameters:
+    income_data (list): Quarterly income statements (get_quarterly_income_statement)
+    balance_data (list): Quarterly balance sheets (get_quarterly_balance_sheet)
+    price_data (PriceSeries | list): Prices covering the span (get_price_series), or
+                                     historical price dictionaries (get_historical_price)
+    year_from (int): First year to include (default: no lower bound)
+    year_to (int): Last year to include (default: no upper bound)
+    method (str): Price lookup semantics, NEAREST or PREVIOUS (see lib_PriceSeries)
+
+    Returns:
+    pd.DataFrame: 'date', 'netIncome', 'shares' and 'price' of the quarters that can be priced
+    """
+    income = _statement_frame(income_data, ['netIncome'])
+    balance = _statement_frame(balance_data, ['commonStock', 'commonStockSharesOutstanding'])
+
+    years = income['date'].str[:4].astype(int)
+    in_span = pd.Series(True, index=income.index)
+    if year_from is not None:
+        in_span &= years >= year_from
+    if year_to is not None:
+        in_span &= years <= year_to
+    income = income[in_span]
+
+    merged = income.merge(balance, on='date', how='left', indicator=True)
+    unmatched = merged['_merge'] == 'left_only'
+    if unmatched.any():
+        print(f"No matching balance sheet data for {', '.join(merged.loc[unmatched, 'date'])}")
+    merged = merged[~unmatched]
+
+    # FMP generally uses 'commonStock' for shares outstanding, fall back to the alternative
+    common_stock = pd.to_numeric(merged['commonStock'], errors='coerce')
+    shares_outstanding = pd.to_numeric(merged['commonStockSharesOutstanding'], errors='coerce')
+    shares = common_stock.where(common_stock.notna() & (common_stock != 0), shares_outstanding)
+    valid_shares = shares.notna() & (shares != 0)
+    if not valid_shares.all():
+        print(f"Could not find valid shares outstanding for {', '.join(merged.loc[~valid_shares, 'date'])}")
+    merged = merged[valid_shares]
+    shares = shares[valid_shares]
+
+    series = price_data if isinstance(price_data, PriceSeries) else PriceSeries.from_fmp(price_data)
+    prices = series.lookup(merged['date'].to_numpy(), method)
+    valid_prices = ~np.isnan(prices) & (prices != 0)
+    if not valid_prices.all():
+        print(f"Could not find price data for {', '.join(merged.loc[~valid_prices, 'date'])}")
+
+    return pd.DataFrame({
+        'date': merged['date'][valid_prices].reset_index(drop=True),
+        'netIncome': pd.to_numeric(merged['netIncome'], errors='coerce')[valid_prices].to_numpy(dtype=float),
+        'shares': shares[valid_prices].to_numpy(dtype=float),
+        'price': prices[valid_prices],
+    })
+
+
+def input_hashes(inputs):
+    """
+    Fingerprint of each quarter's P/E inputs
+
+    Parameters:
+    inputs (pd.DataFrame): Output of quarter_inputs()
+
+    Returns:
+    pd.Series: Hex digest per quarter, aligned with inputs
+    """
+    hashes = pd.util.hash_pandas_object(inputs[['netIncome', 'shares', 'price']].astype(float), index=False)
+    return hashes.map('{:016x}'.format)
+
+
+def pe_from_inputs(inputs):
+    """
+    Quarterly P/E table from quarter inputs, computed as column operations
+
+    Parameters:
+    inputs (pd.DataFrame): Output of quarter_inputs()
+
+    Returns:
+    pd.DataFrame: Quarterly P/E ratios (PE_COLUMNS) sorted by date
+    """
+    dates = inputs['date']
+    eps = inputs['netIncome'].to_numpy() / inputs['shares'].to_numpy()
+    prices = inputs['price'].to_numpy()
+    with np.errstate(divide='ignore'):
+        pe_ratios = np.where(eps != 0, prices / np.where(eps != 0, eps, 1), np.inf)
+
+    quarter_nums = (dates.str[5:7].astype(int) - 1) // 3 + 1
+    result = pd.DataFrame({
+        'Quarter': 'Q' + quarter_nums.astype(str) + ' ' + dates.str[:4],
+        'Date': dates,
+        'Price': prices,
+        'EPS': eps,
+        'P/E Ratio': pe_ratios,
+    }, columns=PE_COLUMNS)
+
+    return result.sort_values('Date', kind='stable').reset_index(drop=True)
+
+
+def build_quarterly_pe_history(income_data, balance_data, price_data, year_from=None, year_to=None,
+                               method=NEAREST):
+    """
+    Build the quarterly P/E history from downloaded FMP data in one pass
+
+    Parameters:
+    income_data (list): Quarterly income statements (get_quarterly_income_statement)
+    balance_data (list): Quarterly balance sheets (get_quarterly_balance_sheet)
+    price_data (PriceSeries | list): Prices covering the span, see quarter_inputs
+    year_from (int): First year to include (default: no lower bound)
+    year_to (int): Last year to include (default: no upper bound)
+    method (str): Price lookup semantics, NEAREST or PREVIOUS (see lib_PriceSeries)
+
+    Returns:
+    pd.DataFrame: Quarterly P/E ratios sorted by date
+    """
+    return pe_from_inputs(quarter_inputs(income_data, balance_data, price_data, year_from, year_to, method))
+
+
+def calculate_quarterly_pe_range(ticker, year_from, year_to, api_key, method=NEAREST, client=None):
+    """
+    Calculate quarterly P/E ratios for a span of years from a single download
+
+    Each statement is fetched once for the whole span (instead of once per year)
+    and the prices for the span are read from the cached price store (lib_FInSources.get_price_series).
+
+    Parameters:
+    ticker (str): Stock ticker symbol
+    year_from (int): First year to analyze
+    year_to (int): Last year to analyze
+    api_key (str): FMP API key
+    method (str): Price lookup semantics, NEAREST or PREVIOUS (see lib_PriceSeries)
+    client (FmpClient): Client to use (default: the shared process-wide client)
+
+    Returns:
+    pd.DataFrame: DataFrame with quarterly P/E ratios
+    """
+    print(f"Fetching quarterly financial data for {ticker} in {year_from}-{year_to}...")
+
+    income_data = lib_FInSources.get_quarterly_income_statement(ticker, api_key, client)
+    if not income_data:
+        print("Failed to retrieve income statement data.")
+        return pd.DataFrame()
+
+    balance_data = lib_FInSources.get_quarterly_balance_sheet(ticker, api_key, client)
+    if not balance_data:
+        print("Failed to retrieve balance sheet data.")
+        return pd.DataFrame()
+
+    price_data = lib_FInSources.get_price_series(ticker, f"{year_from}-01-01", f"{year_to}-12-31",
+                                                 api_key, client=client)
+    if not price_data:
+        print(f"No historical price data available for {ticker} in {year_from}-{year_to}")
+        return pd.DataFrame()
+
+    return build_quarterly_pe_history(income_data, balance_data, price_data, year_from, year_to, method)
+
+
+def update_quarterly_pe_history(ticker, year_from, year_to, api_key, store, method=NEAREST, client=None):
+    """
+    Incrementally calculate quarterly P/E ratios, recomputing only quarters whose inputs changed
+
+    Quarters are persisted in store together with the hash of their inputs
+    (net income, shares, price). Once a span has been computed, later runs
+    only download the statements newer than the latest stored quarter (plus
+    RECHECK_QUARTERS already stored ones to catch restatements) and only
+    write the quarters whose input hash differs.
+
+    Parameters:
+    ticker (str): Stock ticker symbol
+    year_from (int): First year to analyze
+    year_to (int): Last year to analyze
+    api_key (str): FMP API key
+    store (PESnapshotStore): Snapshot store of the computed quarters (see lib_PESnapshots)
+    method (str): Price lookup semantics, NEAREST or PREVIOUS (see lib_PriceSeries)
+    client (FmpClient): Client to use (default: the shared process-wide client)
+
+    Returns:
+    pd.DataFrame: DataFrame with quarterly P/E ratios
+    """
+    stored = store.quarters(ticker, year_from, year_to)
+
+    # Only years that were already computed may be skipped, everything after them is downloaded
+    limit = None
+    if not stored.empty:
+        latest = pd.Timestamp(stored['Date'].max())
+        known_years = set(store.years(ticker))
+        if all(year in known_years for year in range(year_from, min(year_to, latest.year) + 1)):
+            today = pd.Timestamp.today()
+            months = (today.year - latest.year) * 12 + today.month - latest.month
+            limit = months // 3 + 1 + RECHECK_QUARTERS
+
+    print(f"Fetching quarterly financial data for {ticker} in {year_from}-{year_to}"
+          f"{f' (latest {limit} quarters)' if limit else ''}...")
+    income_data = lib_FInSources.get_quarterly_income_statement(ticker, api_key, client, limit)
+    balance_data = lib_FInSources.get_quarterly_balance_sheet(ticker, api_key, client, limit)
+    if not income_data or not balance_data:
+        print(f"Failed to retrieve statement data for {ticker}.")
+        return stored[PE_COLUMNS]
+
+    first_year = year_from
+    if limit is not None:
+        first_year = max(year_from, min(int(row['date'][:4]) for row in income_data if row.get('date')))
+    if first_year > year_to:
+        return stored[PE_COLUMNS]
+
+    price_data = lib_FInSources.get_price_series(ticker, f"{first_year}-01-01", f"{year_to}-12-31",
+                                                 api_key, client=client)
+    if not price_data:
+        print(f"No historical price data available for {ticker} in {first_year}-{year_to}")
+        return stored[PE_COLUMNS]
+
+    # Sorted by date, so the recomputed rows come out in the same order as their hashes
+    inputs = quarter_inputs(income_data, balance_data, price_data, first_year, year_to, method)
+    inputs = inputs.sort_values('date', kind='stable').reset_index(drop=True)
+    hashes = input_hashes(inputs)
+    previous = dict(zip(stored['Date'], stored['Input Hash']))
+    changed = (hashes != inputs['date'].map(previous)).to_numpy()
+
+    recomputed = pe_from_inputs(inputs[changed])
+    store.upsert_quarters(ticker, recomputed, hashes[changed].tolist(), range(first_year, year_to + 1))
+    print(f"{ticker}: {int(changed.sum())} of {len(inputs)} quarters recomputed")
+
+    if recomputed.empty:
+        return stored[PE_COLUMNS]
+    if stored.empty:
+        return recomputed
+    result = pd.concat([stored.loc[~stored['Date'].isin(recomputed['Date']), PE_COLUMNS], recomputed])
+    return result.sort_values('Date', kind='stable').reset_index(drop=True)
@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+
+# Numeric columns of the quote table, in display order after the ticker
+QUOTE_COLUMNS = ['Current Price', 'Previous Close', 'Market Cap', 'PE Ratio',
+                 '52 Week High', '52 Week Low', 'Dividend Yield']
+
+
+def _number(value):
+    # Yahoo leaves fields out or fills them with text such as 'Infinity'
+    if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+        return float(value)
+    return np.nan
+
+
+def quote_values(history, info):
+    """
+    Typed quote values of one ticker
+
+    Parameters:
+    history (pd.DataFrame): Price history with a 'Close' column (may be empty)
+    info (dict): Ticker.info of the ticker (may be empty)
+
+    Returns:
+    dict: {column: float} for QUOTE_COLUMNS, NaN where the value is missing
+    """
+    closes = history['Close'].dropna() if history is not None and 'Close' in history else pd.Series(dtype=float)
+    dividend_yield = info.get('dividendYield')
+    return {
+        'Current Price': float(closes.iloc[-1]) if len(closes) > 0 else np.nan,
+        'Previous Close': float(closes.iloc[-2]) if len(closes) > 1 else np.nan,
+        'Market Cap': _number(info.get('marketCap')),
+        'PE Ratio': _number(info.get('trailingPE')),
+        '52 Week High': _number(info.get('fiftyTwoWeekHigh')),
+        '52 Week Low': _number(info.get('fiftyTwoWeekLow')),
+        'Dividend Yield': dividend_yield * 100 if isinstance(dividend_yield, float) else np.nan,
+    }
+
+
+def quote_frame(rows, tickers=None):
+    """
+    Build the quote table
+
+    Parameters:
+    rows (dict): {ticker: quote_values(...)}
+    tickers (list): Row order (default: order of rows)
+
+    Returns:
+    pd.DataFrame: Float columns QUOTE_COLUMNS indexed by 'Ticker'
+    """
+    tickers = [ticker for ticker in (tickers or rows) if ticker in rows]
+    frame = pd.DataFrame([rows[ticker] for ticker in tickers], index=pd.Index(tickers, name='Ticker'),
+                         columns=QUOTE_COLUMNS, dtype=float)
+    return frame
+
+
+def format_market_cap(market_cap):
+    """
+    Format market cap with appropriate abbreviation
+    """
+    if np.isnan(market_cap):
+        return 'N/A'
+    if market_cap >= 1_000_000_000:
+        return f"${market_cap/1_000_000_000:.2f}B"
+    elif market_cap >= 1_000_000:
+        return f"${market_cap/1_000_000:.2f}M"
+    return str(market_cap)
+
+
+_FORMATS = {
+    'Current Price': "${:.2f}",
+    'Previous Close': "${:.2f}",
+    'PE Ratio': "{:.2f}",
+    '52 Week High': "${:.2f}",
+    '52 Week Low': "${:.2f}",
+    'Dividend Yield': "{:.2f}%",
+}
+
+
+def format_value(column, value):
+    """
+    Display string of one quote value
+
+    Parameters:
+    column (str): One of QUOTE_COLUMNS
+    value (float): Value, NaN when missing
+
+    Returns:
+    str: Formatted value, 'N/A' when missing
+    """
+    if column == 'Market Cap':
+        return format_market_cap(value)
+    if np.isnan(value):
+        return 'N/A'
+    return _FORMATS[column].format(value)
+
+
+def display_rows(quotes, tickers=None):
+    """
+    Format rows of the quote table for display
+
+    Parameters:
+    quotes (pd.DataFrame): Quote table (see quote_frame)
+    tickers (list): Tickers to format (default: all)
+
+    Returns:
+    list: (ticker, (ticker, formatted values...)) pairs
+    """
+    if tickers is not None:
+        quotes = quotes.loc[list(tickers)]
+    return [
+        (ticker, (ticker,) + tuple(format_value(column, value) for column, value in zip(QUOTE_COLUMNS, values)))
+        for ticker, values in zip(quotes.index, quotes.to_numpy())
+    ]
+
+
+def changed_tickers(old, new):
+    """
+    Tickers of new whose values differ from old (NaN equals NaN) or that old lacks
+
+    Parameters:
+    old (pd.DataFrame): Previous quote table (None or empty for none)
+    new (pd.DataFrame): Current quote table
+
+    Returns:
+    list: Tickers in the order of new
+    """
+    if old is None or old.empty:
+        return list(new.index)
+    previous = old.reindex(index=new.index, columns=new.columns)
+    same = (new == previous) | (new.isna() & previous.isna())
+    known = new.index.isin(old.index)
+    return list(new.index[~(same.all(axis=1).to_numpy() & known)])
+
+
+def sort_order(quotes, column, reverse=False):
+    """
+    Tickers of the quote table sorted by a column
+
+    Numeric columns are sorted as numbers with missing values last in either
+    direction; 'Ticker' sorts by symbol. The sort is stable.
+
+    Parameters:
+    quotes (pd.DataFrame): Quote table (see quote_frame)
+    column (str): 'Ticker' or one of QUOTE_COLUMNS
+    reverse (bool): Descending order
+
+    Returns:
+    list: Tickers in sorted order
+    """
+    if column == 'Ticker':
+        return sorted(quotes.index, reverse=reverse)
+    values = quotes[column].to_numpy()
+    # argsort puts NaN last; negating keeps it last for the descending order too
+    order = np.argsort(-values if reverse else values, kind='stable')
+    return list(quotes.index[order])
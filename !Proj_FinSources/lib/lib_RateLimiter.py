@@ -0,0 +1,104 @@
+import random
+import threading
+import time
+
+
+def is_throttle_error(error):
+    """
+    Check whether an exception means the data source is rate limiting us
+
+    Parameters:
+    error (Exception): Exception raised by a data source call
+
+    Returns:
+    bool: True for HTTP 429 / "Too Many Requests" / rate-limit errors
+    """
+    if type(error).__name__ in ('YFRateLimitError', 'TooManyRequests'):
+        return True
+    message = str(error).lower()
+    return '429' in message or 'too many requests' in message or 'rate limit' in message
+
+
+class AdaptiveRateLimiter:
+    """
+    Request pacing shared across threads that adapts to observed throttling.
+
+    Calls are not paced at all until the source throttles (HTTP 429 / rate
+    limit errors). A throttle cuts the rate multiplicatively and imposes a
+    jittered exponential backoff, which pauses all threads using the
+    limiter. Every successful call then raises the rate additively; once it
+    is back above max_rate the calls are unpaced again.
+    """
+
+    def __init__(self, initial_rate=None, min_rate=0.2, max_rate=10.0, increase=0.25, decrease=0.5,
+                 base_backoff=2.0, max_backoff=60.0):
+        """
+        Parameters:
+        initial_rate (float): Starting rate in requests per second (default: unpaced)
+        min_rate (float): Lowest rate the limiter slows down to
+        max_rate (float): Rate the first throttle is cut from; calls are unpaced again
+                          once the rate recovers beyond it
+        increase (float): Requests per second added after each success
+        decrease (float): Factor applied to the rate on throttling
+        base_backoff (float): First backoff pause in seconds, doubled on consecutive throttles
+        max_backoff (float): Longest backoff pause in seconds
+        """
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.consecutive_throttles = 0
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    @property
+    def current_rate(self):
+        """
+        Returns:
+        float: Current pacing in requests per second, None while calls are unpaced
+        """
+        with self.lock:
+            return self.rate
+
+    def acquire(self):
+        """
+        Block until the caller may make its next request
+        """
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            if self.rate is not None:
+                self.next_slot = slot + 1.0 / self.rate
+        if slot > now:
+            time.sleep(slot - now)
+
+    def on_success(self):
+        """
+        Report a successful call; speeds the rate up
+        """
+        with self.lock:
+            self.consecutive_throttles = 0
+            if self.rate is not None:
+                self.rate += self.increase
+                if self.rate > self.max_rate:
+                    self.rate = None
+
+    def on_throttle(self):
+        """
+        Report a throttled call (HTTP 429 / rate limit error); slows the rate
+        down and pauses every thread for a jittered exponential backoff
+
+        Returns:
+        float: Backoff pause in seconds
+        """
+        with self.lock:
+            self.consecutive_throttles += 1
+            rate = self.max_rate if self.rate is None else self.rate
+            self.rate = max(self.min_rate, rate * self.decrease)
+            backoff = min(self.max_backoff, self.base_backoff * 2 ** (self.consecutive_throttles - 1))
+            backoff *= random.uniform(0.5, 1.5)
+            self.next_slot = max(self.next_slot, time.monotonic() + backoff)
+            return backoff
@@ -0,0 +1,138 @@
+import threading
+import time
+
+
+class RefreshScheduler:
+    """
+    Runs a refresh function on one worker thread, one refresh at a time.
+
+    Requests made while a refresh is running are coalesced into a single
+    follow-up refresh, so repeated clicks never pile up threads or API
+    calls. Every refresh gets a generation number; a restart request makes
+    the running refresh stale (is_current() turns False), so it can stop
+    early and its late results can be told apart from newer ones. With an
+    interval set, refreshes also run automatically; when a refresh is slow
+    or fails the interval grows by the backoff factor up to max_interval and
+    it returns to the configured interval after the next fast refresh.
+    """
+
+    def __init__(self, refresh, interval=None, max_interval=None, slow_after=None, backoff=2.0):
+        """
+        Parameters:
+        refresh (callable): refresh(generation), called on the worker thread
+        interval (float): Seconds between automatic refreshes (None: only on request)
+        max_interval (float): Longest interval after backoff (default: 8 x interval)
+        slow_after (float): A refresh taking longer is slow (default: half the interval)
+        backoff (float): Factor the interval grows by after a slow or failed refresh
+        """
+        self.refresh = refresh
+        self.backoff = backoff
+        self.condition = threading.Condition()
+        self.generation = 0
+        self.pending = False
+        self.running = False
+        self.closed = False
+        self.last_duration = None
+        self._configure(interval, max_interval, slow_after)
+
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _configure(self, interval, max_interval=None, slow_after=None):
+        self.interval = interval
+        self.max_interval = max_interval or (interval * 8 if interval else None)
+        self.slow_after = slow_after or (interval / 2 if interval else None)
+        self.current_interval = interval
+        # The first automatic refresh is one interval from now
+        self.next_run = time.monotonic() + interval if interval else None
+
+    def set_interval(self, interval, max_interval=None, slow_after=None):
+        """
+        Change the automatic refresh interval
+
+        Parameters:
+        interval (float): Seconds between automatic refreshes (None: turn off)
+        max_interval (float): Longest interval after backoff (default: 8 x interval)
+        slow_after (float): A refresh taking longer is slow (default: half the interval)
+        """
+        with self.condition:
+            self._configure(interval, max_interval, slow_after)
+            self.condition.notify()
+
+    def request(self, restart=False):
+        """
+        Ask for a refresh
+
+        Parameters:
+        restart (bool): Supersede a running refresh (e.g. the inputs changed)
+        instead of refreshing again after it
+        """
+        with self.condition:
+            self.pending = True
+            if restart and self.running:
+                self.generation += 1
+            self.condition.notify()
+
+    def is_current(self, generation):
+        """
+        Parameters:
+        generation (int): Generation a refresh was started with
+
+        Returns:
+        bool: False once the refresh has been superseded
+        """
+        return generation == self.generation
+
+    def close(self):
+        """
+        Stop the worker after the running refresh; a running refresh becomes stale
+        """
+        with self.condition:
+            self.closed = True
+            self.generation += 1
+            self.condition.notify()
+
+    def _wait_for_work(self):
+        # Returns the generation of the next refresh, or None when closed
+        with self.condition:
+            while not self.closed:
+                if self.pending:
+                    break
+                if self.next_run is not None:
+                    timeout = self.next_run - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    self.condition.wait(timeout)
+                else:
+                    self.condition.wait()
+            if self.closed:
+                return None
+            self.pending = False
+            self.running = True
+            self.generation += 1
+            return self.generation
+
+    def _run(self):
+        while True:
+            generation = self._wait_for_work()
+            if generation is None:
+                return
+
+            started = time.monotonic()
+            failed = False
+            try:
+                self.refresh(generation)
+            except Exception as e:
+                print(f"Error refreshing: {e}")
+                failed = True
+            duration = time.monotonic() - started
+
+            with self.condition:
+                self.running = False
+                self.last_duration = duration
+                if self.interval:
+                    if failed or duration > self.slow_after:
+                        self.current_interval = min(self.current_interval * self.backoff, self.max_interval)
+                    else:
+                        self.current_interval = self.interval
+                    self.next_run = time.monotonic() + self.current_interval
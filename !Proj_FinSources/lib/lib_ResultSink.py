@@ -0,0 +1,180 @@
+import csv
+import json
+import math
+import os
+import threading
+
+
+def read_ticker_file(path):
+    """
+    Read ticker symbols from a text file
+
+    One ticker per line (or several separated by commas/whitespace); blank lines
+    and text after '#' are ignored. Duplicates are dropped, order is kept.
+
+    Parameters:
+    path (str): Ticker file
+
+    Returns:
+    list: Upper-case ticker symbols
+    """
+    tickers = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            for ticker in line.split("#", 1)[0].replace(",", " ").split():
+                ticker = ticker.upper()
+                if ticker not in tickers:
+                    tickers.append(ticker)
+    return tickers
+
+
+def _json_value(value):
+    # NaN and infinite values (e.g. P/E with zero EPS) become null
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if hasattr(value, "item"):
+        return _json_value(value.item())
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+class ResultSink:
+    """
+    Append-only JSONL or CSV output written one ticker at a time.
+
+    Every write() is flushed and synced to disk, so a crashed or killed run
+    keeps everything finished so far. A ticker counts as written only once
+    its whole block of rows is on disk: the sidecar file '<path>.done' then
+    gets a line with the ticker and the file size after its block.
+    Reopening an existing file resumes it: the file is cut back to the end
+    of the last complete block, dropping a partially written ticker, and
+    completed() lists the tickers already present. Tickers without rows
+    are not recorded and are retried.
+    """
+
+    def __init__(self, path, resume=True, ticker_column="Ticker"):
+        """
+        Parameters:
+        path (str): Output file, '.csv' for CSV and anything else for JSON lines
+        resume (bool): Keep an existing file and append to it (False: start over)
+        ticker_column (str): Column holding the ticker symbol
+        """
+        self.path = path
+        self.done_path = path + ".done"
+        self.format = "csv" if path.lower().endswith(".csv") else "jsonl"
+        self.ticker_column = ticker_column
+        self.lock = threading.Lock()
+        self.columns = None
+        self.completed_tickers = set()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        resume = resume and os.path.exists(path)
+        legacy = []
+        if resume:
+            if os.path.exists(self.done_path):
+                self._recover()
+            else:
+                legacy = self._recover_legacy()
+        # Binary mode, so the offsets in the sidecar file are exact byte positions
+        self.file = open(path, "ab" if resume else "wb")
+        self.done_file = open(self.done_path, "a" if resume else "w", encoding="utf-8")
+        if legacy:
+            self._mark_done(legacy)
+
+    def _recover(self):
+        # Completed blocks are the lines of the sidecar file that were fully written
+        with open(self.done_path, "rb+") as f:
+            data = f.read()
+            end = data.rfind(b"\n") + 1
+            if end != len(data):
+                f.truncate(end)
+        size = 0
+        for line in data[:end].decode("utf-8").splitlines():
+            ticker, offset = line.rsplit("\t", 1)
+            self.completed_tickers.add(ticker)
+            size = max(size, int(offset))
+
+        # Drop whatever follows the last complete block (a ticker that was being written)
+        with open(self.path, "rb+") as f:
+            f.truncate(size)
+        if self.format == "csv" and size:
+            with open(self.path, "r", encoding="utf-8", newline="") as f:
+                self.columns = next(csv.reader(f))
+
+    def _recover_legacy(self):
+        # Files written before the sidecar existed: cut an incomplete last line and trust the rest
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            end = data.rfind(b"\n") + 1
+            if end != len(data):
+                f.truncate(end)
+
+        with open(self.path, "r", encoding="utf-8", newline="") as f:
+            if self.format == "csv":
+                reader = csv.DictReader(f)
+                self.columns = reader.fieldnames
+                tickers = [row[self.ticker_column] for row in reader]
+            else:
+                tickers = [json.loads(line).get(self.ticker_column) for line in f if line.strip()]
+        self.completed_tickers.update(tickers)
+        return list(dict.fromkeys(tickers))
+
+    def _mark_done(self, tickers):
+        # Called after the data is synced; the sidecar line is what makes a ticker count as written
+        offset = self.file.tell()
+        for ticker in tickers:
+            self.done_file.write(f"{ticker}\t{offset}\n")
+        self.done_file.flush()
+        os.fsync(self.done_file.fileno())
+
+    def completed(self):
+        """
+        Returns:
+        set: Tickers already written (including by a previous run)
+        """
+        with self.lock:
+            return set(self.completed_tickers)
+
+    def write(self, ticker, frame):
+        """
+        Append the rows of one ticker and flush them to disk
+
+        Parameters:
+        ticker (str): Stock ticker symbol
+        frame (pd.DataFrame): Result rows of the ticker (nothing is written when empty)
+        """
+        if frame is None or frame.empty:
+            return
+        frame = frame.copy()
+        frame.insert(0, self.ticker_column, ticker)
+
+        with self.lock:
+            # The whole block is serialised first and written at once
+            if self.format == "csv":
+                write_header = self.columns is None
+                if write_header:
+                    self.columns = list(frame.columns)
+                block = frame.reindex(columns=self.columns).to_csv(header=write_header, index=False)
+            else:
+                block = "".join(
+                    json.dumps({key: _json_value(value) for key, value in record.items()}) + "\n"
+                    for record in frame.to_dict("records")
+                )
+            self.file.write(block.encode("utf-8"))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self._mark_done([ticker])
+            self.completed_tickers.add(ticker)
+
+    def close(self):
+        self.file.close()
+        self.done_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,143 @@
+import codecs
+import json
+from array import array
+from datetime import date
+
+import numpy as np
+
+_EPOCH = date(1970, 1, 1)
+_WHITESPACE = " \t\r\n"
+# Characters that can follow a complete number or literal inside an array
+_DELIMITERS = _WHITESPACE + ",]"
+
+# Drop the already parsed part of the buffer once it grows beyond this many characters
+_COMPACT_AT = 1 << 16
+
+
+class ColumnSink:
+    """
+    Collects price bars into compact typed arrays instead of a list of dicts.
+
+    Dates are kept as int32 days since 1970-01-01 and prices/volume as float64,
+    so memory grows by 44 bytes per bar regardless of the JSON layout.
+    """
+
+    FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self):
+        self.days = array('i')
+        self.columns = {field: array('d') for field in self.FIELDS}
+
+    def __len__(self):
+        return len(self.days)
+
+    def append(self, bar):
+        """
+        Add one bar
+
+        Parameters:
+        bar (dict): Price bar with 'date' (YYYY-MM-DD) and the FIELDS values
+        """
+        self.days.append((date.fromisoformat(bar['date'][:10]) - _EPOCH).days)
+        for field, column in self.columns.items():
+            value = bar.get(field)
+            column.append(float('nan') if value is None else value)
+
+    def to_columns(self):
+        """
+        Returns:
+        dict: 'date' (datetime64[D]) plus FIELDS numpy arrays, sorted by date,
+              accepted by lib_PriceStore.PriceStore.write
+        """
+        dates = np.frombuffer(self.days, dtype=np.int32).astype('datetime64[D]')
+        order = np.argsort(dates, kind='stable')
+        columns = {'date': dates[order]}
+        for field, column in self.columns.items():
+            columns[field] = np.frombuffer(column, dtype=np.float64)[order]
+        return columns
+
+
+def iter_array_items(chunks, key):
+    """
+    Incrementally parse the items of a top-level JSON array member
+
+    Only the item currently being parsed and one chunk of raw text are held in
+    memory; the enclosing object is never materialised.
+
+    Parameters:
+    chunks (iterable): Raw response body chunks (bytes or str)
+    key (str): Name of the array member of the top-level object, e.g. "historical"
+
+    Yields:
+    object: Parsed array items, in document order
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    marker = json.dumps(key)
+    chunks = iter(chunks)
+
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def read_more():
+        nonlocal buffer, pos, eof
+        for chunk in chunks:
+            if not chunk:
+                continue
+            text = utf8.decode(chunk) if isinstance(chunk, bytes) else chunk
+            buffer = buffer[pos:] + text
+            pos = 0
+            return True
+        eof = True
+        return False
+
+    # Locate '"key" : ['
+    while True:
+        found = buffer.find(marker, pos)
+        if found >= 0:
+            pos = found + len(marker)
+            break
+        # Keep a tail in case the marker is split across chunks
+        pos = max(pos, len(buffer) - len(marker))
+        if not read_more():
+            return
+
+    for expected in (':', '['):
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer):
+                break
+            if not read_more():
+                return
+        if buffer[pos] != expected:
+            return
+        pos += 1
+
+    while True:
+        while pos < len(buffer) and (buffer[pos] in _WHITESPACE or buffer[pos] == ','):
+            pos += 1
+        if pos >= len(buffer):
+            if not read_more():
+                raise ValueError(f"Unexpected end of JSON inside '{key}' array")
+            continue
+        if buffer[pos] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof or not read_more():
+                raise ValueError(f"Unexpected end of JSON inside '{key}' array")
+            continue
+        if not isinstance(item, (dict, list, str)) and (end == len(buffer) or buffer[end] not in _DELIMITERS):
+            # A number or literal is complete only once a delimiter follows: "7." may be the start of "7.5e3"
+            if read_more():
+                continue
+            if end < len(buffer):
+                raise ValueError(f"Invalid JSON inside '{key}' array")
+        pos = end
+        yield item
+        if pos > _COMPACT_AT:
+            buffer = buffer[pos:]
+            pos = 0
@@ -0,0 +1,174 @@
+import math
+
+
+def _stable_keys(current, target):
+    # Longest run of items whose relative order is already right: those never have to move
+    position = {key: index for index, key in enumerate(current)}
+    sequence = [key for key in target if key in position]
+    tails, tail_keys, previous = [], [], {}
+    for key in sequence:
+        value = position[key]
+        low, high = 0, len(tails)
+        while low < high:
+            middle = (low + high) // 2
+            if tails[middle] < value:
+                low = middle + 1
+            else:
+                high = middle
+        previous[key] = tail_keys[low - 1] if low else None
+        if low == len(tails):
+            tails.append(value)
+            tail_keys.append(key)
+        else:
+            tails[low] = value
+            tail_keys[low] = key
+
+    stable = set()
+    key = tail_keys[-1] if tail_keys else None
+    while key is not None:
+        stable.add(key)
+        key = previous[key]
+    return stable
+
+
+class TreeviewSync:
+    """
+    Keyed rows of a ttk.Treeview updated by diffing instead of rebuilding.
+
+    Every row uses its key (e.g. the ticker) as item id. update() only sets
+    the cells whose values changed, inserts added keys and deletes removed
+    ones; changed rows can be highlighted for a moment. reorder() moves the
+    fewest rows needed to reach a new order.
+    """
+
+    def __init__(self, tree, columns, highlight_ms=1500, highlight_color='#fff3b0'):
+        """
+        Parameters:
+        tree (ttk.Treeview): Tree to manage
+        columns (list): Column ids in the order of the row values
+        highlight_ms (int): How long changed rows stay highlighted (0 disables highlighting)
+        highlight_color (str): Background of highlighted rows
+        """
+        self.tree = tree
+        self.columns = list(columns)
+        self.highlight_ms = highlight_ms
+        self.values = {}
+        self._highlight_jobs = {}
+        if highlight_ms:
+            tree.tag_configure('changed', background=highlight_color)
+
+    def keys(self):
+        """
+        Returns:
+        tuple: Row keys in display order
+        """
+        return self.tree.get_children('')
+
+    def visible_keys(self):
+        """
+        Returns:
+        tuple: Keys of the rows currently scrolled into view, in display order
+        """
+        keys = self.keys()
+        first, last = self.tree.yview()
+        return keys[int(first * len(keys)):math.ceil(last * len(keys))]
+
+    def update(self, rows, remove_missing=True, highlight=True):
+        """
+        Apply new row values, touching only what changed
+
+        Parameters:
+        rows (list): (key, values) pairs; values in the order of columns
+        remove_missing (bool): Delete rows whose key is not in rows
+        highlight (bool): Highlight the changed rows
+
+        Returns:
+        tuple: (added keys, changed keys, removed keys)
+        """
+        added, changed = [], []
+        seen = set()
+        for key, values in rows:
+            values = tuple('' if value is None else str(value) for value in values)
+            seen.add(key)
+            old_values = self.values.get(key)
+            if old_values is None:
+                self.tree.insert('', 'end', iid=key, values=values)
+                added.append(key)
+            elif old_values != values:
+                for column, old_value, value in zip(self.columns, old_values, values):
+                    if old_value != value:
+                        self.tree.set(key, column, value)
+                changed.append(key)
+                if highlight:
+                    self._highlight(key)
+            self.values[key] = values
+
+        removed = self.retain(seen) if remove_missing else []
+        return added, changed, removed
+
+    def retain(self, keys):
+        """
+        Delete every row whose key is not in keys
+
+        Parameters:
+        keys (iterable): Keys to keep
+
+        Returns:
+        list: Removed keys
+        """
+        keys = set(keys)
+        removed = [key for key in self.values if key not in keys]
+        for key in removed:
+            self.remove(key)
+        return removed
+
+    def remove(self, key):
+        """
+        Delete the row of a key (no-op when it does not exist)
+
+        Parameters:
+        key (str): Row key
+        """
+        if self.values.pop(key, None) is not None:
+            self.tree.delete(key)
+        job = self._highlight_jobs.pop(key, None)
+        if job is not None:
+            self.tree.after_cancel(job)
+
+    def _highlight(self, key):
+        if not self.highlight_ms:
+            return
+        job = self._highlight_jobs.pop(key, None)
+        if job is not None:
+            self.tree.after_cancel(job)
+        self.tree.item(key, tags=('changed',))
+        self._highlight_jobs[key] = self.tree.after(self.highlight_ms, self._unhighlight, key)
+
+    def _unhighlight(self, key):
+        self._highlight_jobs.pop(key, None)
+        if key in self.values:
+            self.tree.item(key, tags=())
+
+    def reorder(self, keys):
+        """
+        Bring the rows into the given order with the fewest moves
+
+        Parameters:
+        keys (list): Row keys in the wanted order (keys without a row are ignored)
+
+        Returns:
+        int: Number of rows moved
+        """
+        target = [key for key in keys if key in self.values]
+        stable = _stable_keys(self.keys(), target)
+        moved = 0
+        previous = None
+        for key in target:
+            if key not in stable:
+                # Detached first, so the index of its predecessor is not shifted by the row itself
+                self.tree.detach(key)
+                index = self.tree.index(previous) + 1 if previous is not None else 0
+                self.tree.move(key, '', index)
+                moved += 1
+            previous = key
+        return moved
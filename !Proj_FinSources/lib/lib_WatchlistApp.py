@@ -0,0 +1,402 @@
+import queue
+import sys
+import tkinter as tk
+from tkinter import filedialog
+from tkinter import ttk
+
+import pandas as pd
+
+import lib_PriceStore
+import lib_QuoteTable
+import lib_RefreshScheduler
+import lib_ResultSink
+import lib_TreeviewSync
+import lib_YahooBatch
+
+# Item id of the placeholder row shown until the first data arrives
+LOADING_ROW = "__loading__"
+
+# Watchlist used when no ticker file is given
+DEFAULT_TICKERS = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'META']
+
+# Columns of the quote table
+HEADINGS = ['Ticker'] + lib_QuoteTable.QUOTE_COLUMNS
+
+# How often the Tk loop takes arrived results off the queue, and how many per turn
+DRAIN_INTERVAL_MS = 100
+MAX_UPDATES_PER_DRAIN = 200
+
+# Automatic refresh choices (seconds, None: only on request)
+AUTO_REFRESH_CHOICES = {'Off': None, '30 s': 30, '1 min': 60, '5 min': 300}
+
+
+class WatchlistApp:
+    """
+    Live quote table of a watchlist, shared by the StockDataApp viewers.
+
+    Refreshes run on a RefreshScheduler worker thread and stream every
+    ticker's result through a queue into the Tk loop, where rows of a
+    Treeview are updated in place (see lib_TreeviewSync) from a typed quote
+    table (see lib_QuoteTable). Price histories are kept in the "yahoo"
+    price store (see lib_PriceStore), so a start shows the stored bars at
+    once and a refresh only downloads the bars after them. Subclasses lay
+    out the window: they call create_table() and create_controls() where
+    the widgets belong and start() once everything exists. on_watchlist_changed() and
+    on_quotes_updated() let them follow the data, e.g. with a chart.
+    """
+
+    # Days of daily price history shown for every ticker
+    history_days = 365
+
+    def __init__(self, root, tickers=None, max_workers=8):
+        """
+        Parameters:
+        root (tk.Tk): Main window
+        tickers (list): Stock tickers to track (default: DEFAULT_TICKERS)
+        max_workers (int): Concurrent Yahoo info requests during a refresh
+        """
+        self.root = root
+        self.tickers = list(tickers or DEFAULT_TICKERS)
+        self.max_workers = max_workers
+        self.headings = HEADINGS
+
+        # Rows are keyed by ticker and updated in place; sort_state is (column, reverse) of the last sort
+        self.tree = None
+        self.rows = None
+        self.sort_state = None
+
+        # Typed quote table (floats, NaN when missing); rows are formatted only when they are in view
+        self.quotes = lib_QuoteTable.quote_frame({})
+        self.unformatted = set()
+        self.placeholders = set()
+
+        # Raw data per ticker and the queue the refresh thread hands them over with
+        self.infos = {}
+        self.historical_data = {}
+        self.updates = queue.Queue()
+        self.loaded = set()
+        self.scheduler = None
+
+    def create_table(self, parent, fill=tk.BOTH, **options):
+        """
+        Create the quote Treeview with its scrollbar
+
+        Parameters:
+        parent (tk.Widget): Container to pack the table into
+        fill (str): How the table fills parent (tk.X, tk.Y or tk.BOTH)
+        options: Further ttk.Treeview options, e.g. height=5
+        """
+        self.tree = ttk.Treeview(parent, columns=self.headings, show='headings', **options)
+        for heading in self.headings:
+            self.tree.heading(heading, text=heading, command=lambda h=heading: self.sort_column(h, False))
+            self.tree.column(heading, anchor='center', width=100)
+
+        self.scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.tree.yview)
+        # Called by Tk whenever the view moves: scrolling, resizing, rows added or removed
+        self.tree.configure(yscroll=self.on_table_scrolled)
+
+        self.tree.pack(side=tk.LEFT, fill=fill, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.rows = lib_TreeviewSync.TreeviewSync(self.tree, self.headings)
+
+    def create_controls(self, parent, refresh_interval=None):
+        """
+        Create the refresh and watchlist buttons, the progress bar and the auto-refresh choice
+
+        Parameters:
+        parent (tk.Widget): Container to pack the controls into
+        refresh_interval (int): Initial automatic refresh interval in seconds, one of
+                                AUTO_REFRESH_CHOICES (default: off)
+        """
+        self.refresh_button = ttk.Button(parent, text="Refresh Data", command=self.update_stock_data)
+        self.refresh_button.pack(pady=10)
+
+        self.watchlist_button = ttk.Button(parent, text="Load Watchlist...", command=self.choose_watchlist)
+        self.watchlist_button.pack()
+        self.progress = ttk.Progressbar(parent, mode='determinate', length=300)
+        self.progress.pack(pady=5)
+        self.status_label = ttk.Label(parent, text="")
+        self.status_label.pack()
+
+        self.auto_refresh_var = tk.StringVar()
+        self.auto_refresh_dropdown = ttk.Combobox(
+            parent,
+            textvariable=self.auto_refresh_var,
+            values=list(AUTO_REFRESH_CHOICES),
+            state="readonly",
+            width=8
+        )
+        self.auto_refresh_dropdown.set(next(
+            (label for label, seconds in AUTO_REFRESH_CHOICES.items() if seconds == refresh_interval), 'Off'))
+        self.auto_refresh_dropdown.pack(pady=5)
+        self.auto_refresh_dropdown.bind('<<ComboboxSelected>>', self.change_auto_refresh)
+
+    def start(self):
+        """
+        Start refreshing once the widgets exist
+        """
+        # One worker thread runs all refreshes; the Tk loop keeps picking up their results
+        self.scheduler = lib_RefreshScheduler.RefreshScheduler(
+            self.refresh_stock_data, AUTO_REFRESH_CHOICES[self.auto_refresh_var.get()])
+        self.root.after(DRAIN_INTERVAL_MS, self.drain_updates)
+
+        # Initially populate data
+        self.update_stock_data()
+
+    def on_table_scrolled(self, first, last):
+        """
+        Move the scrollbar and format the rows that came into view
+        """
+        self.scrollbar.set(first, last)
+        self.format_visible()
+
+    def format_visible(self):
+        """
+        Format the rows in view whose quotes changed since they were last shown
+        """
+        visible = [ticker for ticker in self.rows.visible_keys() if ticker in self.unformatted]
+        if not visible:
+            return
+        self.unformatted.difference_update(visible)
+        # A row shown for the first time is new, not changed: it is not highlighted
+        first_shown = [ticker for ticker in visible if ticker in self.placeholders]
+        self.placeholders.difference_update(first_shown)
+        updated = [ticker for ticker in visible if ticker not in first_shown]
+        if first_shown:
+            self.rows.update(lib_QuoteTable.display_rows(self.quotes, first_shown), remove_missing=False,
+                             highlight=False)
+        if updated:
+            self.rows.update(lib_QuoteTable.display_rows(self.quotes, updated), remove_missing=False)
+
+    def on_watchlist_changed(self):
+        """
+        Called after load_watchlist replaced self.tickers, before the refresh
+        """
+
+    def on_quotes_updated(self, tickers):
+        """
+        Called after the table showed new data
+
+        Parameters:
+        tickers (set): Tickers with new data
+        """
+
+    def load_watchlist(self, path):
+        """
+        Track the tickers of a watchlist file and refresh
+
+        Parameters:
+        path (str): Text file with one ticker per line (or separated by commas)
+        """
+        try:
+            tickers = lib_ResultSink.read_ticker_file(path)
+        except OSError as e:
+            print(f"Error reading watchlist {path}: {e}")
+            return
+        if not tickers:
+            print(f"No tickers found in {path}")
+            return
+
+        self.tickers = tickers
+        self.on_watchlist_changed()
+        self.update_stock_data(restart=True)
+
+    def choose_watchlist(self):
+        """
+        Ask for a watchlist file and load it
+        """
+        path = filedialog.askopenfilename(
+            title="Load Watchlist",
+            filetypes=[("Ticker lists", "*.txt *.csv"), ("All files", "*.*")]
+        )
+        if path:
+            self.load_watchlist(path)
+
+    def change_auto_refresh(self, event=None):
+        """
+        Apply the automatic refresh interval chosen in the dropdown
+        """
+        self.scheduler.set_interval(AUTO_REFRESH_CHOICES[self.auto_refresh_var.get()])
+
+    def update_stock_data(self, restart=False):
+        """
+        Ask for the latest stock data
+
+        Refreshes run one at a time on the scheduler's worker thread: clicks
+        during a refresh are coalesced into one follow-up refresh, and
+        restart=True (e.g. a new watchlist) supersedes the running one.
+
+        Parameters:
+        restart (bool): Drop the running refresh instead of refreshing after it
+        """
+        # Show loading until the first data arrives; existing rows stay until they are updated
+        if not self.rows.values and not self.tree.exists(LOADING_ROW):
+            blanks = ('',) * (len(self.headings) - 1)
+            self.tree.insert('', 'end', iid=LOADING_ROW, values=('Loading data...',) + blanks)
+
+        self.scheduler.request(restart)
+
+    def refresh_stock_data(self, generation):
+        """
+        Fetch the watchlist and stream the results to the Tk loop (runs on the scheduler's thread)
+
+        The stored price histories are queued first. Every ticker's download
+        is then merged into the store and queued as soon as it arrives (see
+        lib_YahooBatch.iter_quotes), tagged with the refresh generation, so
+        the first rows appear long before the slowest ticker returns and a
+        superseded refresh stops and never overwrites newer data.
+
+        Parameters:
+        generation (int): Generation of this refresh (see RefreshScheduler)
+        """
+        tickers = list(self.tickers)
+        self.updates.put(('started', generation, tickers))
+        try:
+            store = lib_PriceStore.get_default_store("yahoo")
+            start = (pd.Timestamp.today().normalize() - pd.Timedelta(days=self.history_days)).strftime('%Y-%m-%d')
+
+            # Download from the oldest latest stored bar on (the latest bars may still change),
+            # or the whole span when a ticker's stored bars ('from' on) do not cover it
+            download_from = None
+            uncovered = set()
+            for ticker in tickers:
+                meta = store.meta(ticker)
+                if meta is None or not meta['last'] or meta['last'] < start or meta.get('from', meta['first']) > start:
+                    uncovered.add(ticker)
+                    download_from = start
+                    continue
+                self.updates.put(('quote', generation, (ticker, store.read_frame(ticker, start), None)))
+                if download_from is None or meta['last'] < download_from:
+                    download_from = meta['last']
+
+            # Unadjusted prices, so a dividend does not change the bars already stored
+            for ticker, history, info in lib_YahooBatch.iter_quotes(tickers, self.max_workers,
+                                                                    start=download_from or start,
+                                                                    auto_adjust=False):
+                if not self.scheduler.is_current(generation):
+                    break
+                if history is not None:
+                    if not history.empty:
+                        store.write_frame(ticker, history, meta={'from': start} if ticker in uncovered else None)
+                    history = store.read_frame(ticker, start)
+                self.updates.put(('quote', generation, (ticker, history, info)))
+        finally:
+            self.updates.put(('finished', generation, None))
+
+    def drain_updates(self):
+        """
+        Show the results that arrived since the last call (runs in the Tk loop)
+        """
+        tickers = set()
+        finished = False
+        while len(tickers) < MAX_UPDATES_PER_DRAIN:
+            try:
+                kind, generation, payload = self.updates.get_nowait()
+            except queue.Empty:
+                break
+            if not self.scheduler.is_current(generation):
+                # Left over from a superseded refresh
+                continue
+            if kind == 'started':
+                self.loaded = set()
+                self.progress.config(maximum=len(payload), value=0)
+            elif kind == 'quote':
+                ticker, history, info = payload
+                if history is not None:
+                    self.historical_data[ticker] = history
+                if info is not None:
+                    self.infos[ticker] = info
+                    self.loaded.add(ticker)
+                tickers.add(ticker)
+            else:
+                finished = True
+                break
+
+        if tickers:
+            self.update_treeview(tickers)
+
+        total = len(self.tickers)
+        self.progress.config(value=len(self.loaded))
+        if self.scheduler.running and not finished:
+            self.status_label.config(text=f"Loading {len(self.loaded)} of {total} tickers...")
+        elif finished:
+            for ticker in self.tickers:
+                if ticker not in self.quotes.index:
+                    print(f"Error fetching data for {ticker}: no data")
+            self.status_label.config(text=f"Loaded {len(self.quotes)} of {total} tickers")
+
+        self.root.after(DRAIN_INTERVAL_MS, self.drain_updates)
+
+    def update_treeview(self, tickers):
+        """
+        Update Treeview with the latest data of some tickers
+
+        Parameters:
+        tickers (set): Tickers with new data
+        """
+        # Extract key metrics as numbers; a ticker without any data is left out
+        rows = {
+            ticker: lib_QuoteTable.quote_values(self.historical_data.get(ticker), self.infos.get(ticker, {}))
+            for ticker in tickers
+        }
+        batch = lib_QuoteTable.quote_frame(rows)
+        quotes = pd.concat([self.quotes.drop(index=batch.index, errors='ignore'), batch])
+        quotes = quotes[quotes.notna().any(axis=1)]
+        stock_data = quotes.reindex([ticker for ticker in self.tickers if ticker in quotes.index])
+
+        if self.tree.exists(LOADING_ROW) and not stock_data.empty:
+            self.tree.delete(LOADING_ROW)
+
+        # Only tickers whose values changed need formatting, and only once they are in view;
+        # new tickers get their place in the table right away, drop the ones without data
+        changed = lib_QuoteTable.changed_tickers(self.quotes, stock_data)
+        self.quotes = stock_data
+        self.unformatted.update(changed)
+        self.unformatted.intersection_update(stock_data.index)
+        blanks = ('',) * len(lib_QuoteTable.QUOTE_COLUMNS)
+        added = [ticker for ticker in changed if ticker not in self.rows.values]
+        self.placeholders.update(added)
+        self.rows.update([(ticker, (ticker,) + blanks) for ticker in added], remove_missing=False)
+        self.placeholders.difference_update(self.rows.retain(stock_data.index))
+
+        # Keep the active sort order, or else the watchlist order, for arriving rows
+        if self.sort_state:
+            self.sort_column(*self.sort_state)
+        else:
+            self.rows.reorder(list(stock_data.index))
+            self.format_visible()
+
+        self.on_quotes_updated(tickers)
+
+    def sort_column(self, column, reverse):
+        """
+        Sort the treeview column
+        """
+        # Sort the typed values: numbers as numbers, missing values last
+        keys = lib_QuoteTable.sort_order(self.quotes, column, reverse)
+
+        # Rearrange items, moving only rows that are out of place, and format the ones now in view
+        self.rows.reorder(keys)
+        self.sort_state = (column, reverse)
+        self.format_visible()
+
+        # Toggle sort direction
+        self.tree.heading(column, command=lambda: self.sort_column(column, not reverse))
+
+
+def run(app_class):
+    """
+    Open an app window, tracking the watchlist file given as first command line argument
+
+    Parameters:
+    app_class (type): WatchlistApp subclass taking (root, tickers)
+
+    Returns:
+    WatchlistApp: The app, once its window was closed
+    """
+    root = tk.Tk()
+    tickers = lib_ResultSink.read_ticker_file(sys.argv[1]) if len(sys.argv) > 1 else None
+    app = app_class(root, tickers)
+    root.mainloop()
+    return app
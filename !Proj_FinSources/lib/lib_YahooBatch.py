@@ -0,0 +1,155 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import yfinance as yf
+
+
+def split_histories(prices, tickers):
+    """
+    Split the result of a multi-symbol yf.download(group_by='ticker') per ticker
+
+    Parameters:
+    prices (pd.DataFrame): Downloaded prices (ticker / field column MultiIndex or plain columns)
+    tickers (list): Tickers that were requested
+
+    Returns:
+    dict: {ticker: pd.DataFrame}, tickers without data are left out
+    """
+    histories = {}
+    if prices is None or prices.empty:
+        return histories
+    for ticker in tickers:
+        if isinstance(prices.columns, pd.MultiIndex):
+            if ticker not in prices.columns.get_level_values(0):
+                continue
+            history = prices[ticker]
+        else:
+            history = prices
+        # Other symbols (and exchanges) leave gaps on days this one did not trade
+        history = history.dropna(how='all')
+        if not history.empty:
+            histories[ticker] = history
+    return histories
+
+
+def download_histories(tickers, **options):
+    """
+    Download the price histories of many tickers in one batched request
+
+    Parameters:
+    tickers (list): Stock ticker symbols
+    options: yf.download arguments, e.g. period='1y' or start=/end=
+
+    Returns:
+    dict: {ticker: pd.DataFrame like Ticker.history()}, tickers without data are left out
+    """
+    if not tickers:
+        return {}
+    options.setdefault('auto_adjust', True)
+    options.setdefault('progress', False)
+    prices = yf.download(list(tickers), group_by='ticker', **options)
+    return split_histories(prices, tickers)
+
+
+def _fetch_info(ticker):
+    return yf.Ticker(ticker).info
+
+
+def iter_infos(tickers, max_workers=8, fetch=_fetch_info):
+    """
+    Fetch Ticker.info of many tickers concurrently, yielding each as it arrives
+
+    Parameters:
+    tickers (list): Stock ticker symbols
+    max_workers (int): Maximum number of requests in flight
+    fetch (callable): fetch(ticker) returning the info dict (default: yf.Ticker(ticker).info)
+
+    Yields:
+    tuple: (ticker, info dict), an empty dict when the request failed
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fetch, ticker): ticker for ticker in tickers}
+        try:
+            for future in as_completed(futures):
+                ticker = futures[future]
+                try:
+                    info = future.result() or {}
+                except Exception as e:
+                    print(f"Error fetching info for {ticker}: {e}")
+                    info = {}
+                yield ticker, info
+        finally:
+            # A consumer that stops early does not wait for requests that have not started
+            for future in futures:
+                future.cancel()
+
+
+def fetch_infos(tickers, max_workers=8, fetch=_fetch_info):
+    """
+    Fetch Ticker.info of many tickers concurrently
+
+    Parameters:
+    tickers (list): Stock ticker symbols
+    max_workers (int): Maximum number of requests in flight
+    fetch (callable): fetch(ticker) returning the info dict (default: yf.Ticker(ticker).info)
+
+    Returns:
+    dict: {ticker: info dict}, an empty dict for tickers whose request failed
+    """
+    return dict(iter_infos(tickers, max_workers, fetch))
+
+
+def iter_quotes(tickers, max_workers=8, fetch=_fetch_info, **options):
+    """
+    Stream price histories and Ticker.info of many tickers as they arrive
+
+    The batched price download runs alongside the concurrent info requests,
+    so the first tickers are available as soon as their info returns. A
+    ticker whose info arrives before the download finished is yielded with
+    history None and yielded again with its history once it is there.
+
+    Parameters:
+    tickers (list): Stock ticker symbols
+    max_workers (int): Maximum number of info requests in flight
+    fetch (callable): fetch(ticker) returning the info dict (default: yf.Ticker(ticker).info)
+    options: yf.download arguments, e.g. period='1y'
+
+    Yields:
+    tuple: (ticker, history, info); history is a DataFrame (empty when the ticker
+    has no prices) or None when not downloaded yet, info is a dict or None when
+    only the history is new
+    """
+    def download():
+        try:
+            return download_histories(tickers, **options)
+        except Exception as e:
+            print(f"Error fetching price history: {e}")
+            return {}
+
+    def history(ticker):
+        return histories.get(ticker, pd.DataFrame(columns=['Close']))
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        downloading = executor.submit(download)
+        histories = None
+        waiting = []
+        for ticker, info in iter_infos(tickers, max_workers, fetch):
+            if histories is None and downloading.done():
+                histories = downloading.result()
+                for waiting_ticker in waiting:
+                    yield waiting_ticker, history(waiting_ticker), None
+                waiting = []
+            if histories is None:
+                waiting.append(ticker)
+                yield ticker, None, info
+            else:
+                yield ticker, history(ticker), info
+
+        if histories is None:
+            histories = downloading.result()
+        for waiting_ticker in waiting:
+            yield waiting_ticker, history(waiting_ticker), None
+    finally:
+        # Stopping early does not wait for a download nobody needs anymore
+        executor.shutdown(wait=False)
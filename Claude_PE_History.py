@@ -1,14 +1,58 @@
+import os
+import sys
+import threading
+import numpy as np
 import pandas as pd
 import yfinance as yf
-import matplotlib.pyplot as plt
 from datetime import datetime
-import time
 import requests
 from bs4 import BeautifulSoup
 import re
-import random
 import json
 
+# Make the shared FinSources library importable
+_LIB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '!Proj_FinSources', 'lib')
+if _LIB_DIR not in sys.path:
+    sys.path.insert(0, _LIB_DIR)
+
+import lib_ChartRender
+import lib_Fundamentals
+import lib_PEBatch
+import lib_PESnapshots
+import lib_YahooBatch
+import lib_RateLimiter
+from lib_PriceSeries import PriceSeries, PREVIOUS
+
+# Shared by every yfinance call in this process; paces calls only after Yahoo throttled
+YAHOO_LIMITER = lib_RateLimiter.AdaptiveRateLimiter()
+
+# Statements and info are fetched once per ticker and reused across quarters, retries and years
+FUNDAMENTALS = lib_Fundamentals.get_default_fundamentals()
+
+# Every computed year is kept on disk; past years are answered from here without touching Yahoo.
+# The store is opened on first use (see get_snapshot_store), so importing this script writes nothing.
+_PE_SNAPSHOTS = None
+_PE_SNAPSHOTS_LOCK = threading.Lock()
+
+# (ticker, year) pairs Yahoo has no prices for (delisted, not yet listed); never retried in this process
+NO_PRICE_DATA = set()
+
+# Snapshots of the running year are refreshed after this many seconds
+CURRENT_YEAR_SNAPSHOT_AGE = 24 * 60 * 60
+
+def get_snapshot_store():
+    """
+    Get the store of computed P/E years, opening it on first use
+    
+    Returns:
+    PESnapshotStore: Snapshots of the Yahoo pipeline (see lib_PESnapshots)
+    """
+    global _PE_SNAPSHOTS
+    with _PE_SNAPSHOTS_LOCK:
+        if _PE_SNAPSHOTS is None:
+            _PE_SNAPSHOTS = lib_PESnapshots.PESnapshotStore(source='yahoo')
+        return _PE_SNAPSHOTS
+
 def get_goog_tickers():
     """
     Get a list of tickers that contain 'GOOG'
@@ -71,46 +115,128 @@ def fetch_pe_data_alternative(ticker, year):
     
     return pd.DataFrame(results)
 
-def get_quarterly_pe_with_retry(ticker, year, max_retries=3):
+def load_known_pe(ticker, year):
+    """
+    Get a stored P/E snapshot that is still current
+    
+    Parameters:
+    ticker (str): Stock ticker symbol
+    year (int): Year to analyze
+    
+    Returns:
+    pd.DataFrame: Stored quarterly P/E ratios (empty when unknown or stale)
+    """
+    # Past quarters never change, the running year is re-computed once a day
+    max_age = CURRENT_YEAR_SNAPSHOT_AGE if year >= datetime.now().year else None
+    return get_snapshot_store().load(ticker, year, max_age)
+
+def get_quarterly_pe_with_retry(ticker, year, max_retries=3, price_history=None):
     """
     Get quarterly P/E ratios with retry logic for rate limiting
     
+    Known years are served from the snapshot store, which is also the fallback
+    when all yfinance attempts fail.
+    
     Parameters:
     ticker (str): Stock ticker symbol
     year (int): Year to analyze
     max_retries (int): Maximum number of retry attempts
+    price_history (pd.DataFrame): Already downloaded prices for the first attempt (optional)
     
     Returns:
     pd.DataFrame: DataFrame with quarterly P/E ratios
     """
+    known = load_known_pe(ticker, year)
+    if not known.empty:
+        print(f"Using stored P/E snapshot for {ticker} in {year}.")
+        return known
+    
     for attempt in range(max_retries):
+        if (ticker.upper(), year) in NO_PRICE_DATA:
+            print(f"Yahoo has no prices for {ticker} in {year}, not retrying.")
+            break
         try:
-            # Try using yfinance
-            df = get_quarterly_pe_yfinance(ticker, year)
+            # Try using yfinance; retries download the prices again
+            df = get_quarterly_pe_yfinance(ticker, year, price_history if attempt == 0 else None)
             if not df.empty:
+                get_snapshot_store().save(ticker, year, df)
                 return df
+            if (ticker.upper(), year) in NO_PRICE_DATA:
+                break
             
-            # If yfinance returns empty DataFrame, wait before retry
-            wait_time = (attempt + 1) * 5  # Exponential backoff
-            print(f"Attempt {attempt+1} failed. Waiting {wait_time} seconds before retry...")
-            time.sleep(wait_time)
+            # Throttled fetches have already slowed YAHOO_LIMITER down and
+            # scheduled a backoff, which the next attempt waits for
+            rate = YAHOO_LIMITER.current_rate
+            print(f"Attempt {attempt+1} failed. Retrying{f' at {rate:.2f} requests/s' if rate else ''}...")
         except Exception as e:
             print(f"Error on attempt {attempt+1}: {e}")
-            wait_time = (attempt + 1) * 5
-            print(f"Waiting {wait_time} seconds before retry...")
-            time.sleep(wait_time)
+            if lib_RateLimiter.is_throttle_error(e):
+                wait_time = YAHOO_LIMITER.on_throttle()
+                print(f"Rate limited. Backing off {wait_time:.1f} seconds before retry...")
     
-    # If all retries fail, use alternative data source
+    # If all retries fail, use the last snapshot even when it is stale
+    stored = get_snapshot_store().load(ticker, year)
+    if not stored.empty:
+        print("All yfinance attempts failed. Using stored P/E snapshot.")
+        return stored
+    
+    # Otherwise use alternative data source
     print("All yfinance attempts failed. Using alternative data source.")
     return fetch_pe_data_alternative(ticker, year)
 
-def get_quarterly_pe_yfinance(ticker, year):
+def get_fundamental(stock, ticker, dataset, label):
+    """
+    Get a yfinance fundamentals dataset, downloading it only when not cached
+    
+    Parameters:
+    stock (yf.Ticker): Ticker object used for the download
+    ticker (str): Stock ticker symbol
+    dataset (str): Ticker attribute, e.g. 'quarterly_income_stmt' or 'info'
+    label (str): Name shown in the progress message
+    
+    Returns:
+    pd.DataFrame | dict: The dataset
+    """
+    def fetch():
+        YAHOO_LIMITER.acquire()
+        print(f"Fetching {label}...")
+        return getattr(stock, dataset)
+    
+    return FUNDAMENTALS.get(ticker, dataset, fetch)
+
+def download_price_histories(tickers, year):
+    """
+    Download the price histories of many tickers in one batched yfinance request
+    
+    Parameters:
+    tickers (list): Stock ticker symbols
+    year (int): Year to download
+    
+    Returns:
+    dict: {ticker: pd.DataFrame with a 'Close' column}, tickers without data are left out
+    """
+    if not tickers:
+        return {}
+    YAHOO_LIMITER.acquire()
+    print(f"Fetching historical price data for {len(tickers)} tickers...")
+    try:
+        prices = yf.download(list(tickers), start=f"{year}-01-01", end=f"{year}-12-31",
+                             group_by='ticker', auto_adjust=True, progress=False)
+    except Exception as e:
+        print(f"Error fetching batched price data: {e}")
+        if lib_RateLimiter.is_throttle_error(e):
+            YAHOO_LIMITER.on_throttle()
+        return {}
+    return lib_YahooBatch.split_histories(prices, tickers)
+
+def get_quarterly_pe_yfinance(ticker, year, price_history=None):
     """
     Get quarterly P/E ratios using yfinance
     
     Parameters:
     ticker (str): Stock ticker symbol
     year (int): Year to analyze
+    price_history (pd.DataFrame): Already downloaded prices of the year (default: fetch them)
     
     Returns:
     pd.DataFrame: DataFrame with quarterly P/E ratios
@@ -118,105 +244,225 @@ def get_quarterly_pe_yfinance(ticker, year):
     # Create ticker object
     stock = yf.Ticker(ticker)
     
-    # Add randomized delay to avoid rate limiting
-    time.sleep(random.uniform(1, 3))
-    
-    # Get quarterly financials - use one API call and cache the data
+    # Get quarterly financials - fetched once per ticker and then served from FUNDAMENTALS
     try:
-        print("Fetching quarterly income statement...")
-        quarterly_income = stock.quarterly_income_stmt
+        quarterly_income = get_fundamental(stock, ticker, 'quarterly_income_stmt', "quarterly income statement")
+        quarterly_balance = get_fundamental(stock, ticker, 'quarterly_balance_sheet', "quarterly balance sheet")
         
-        print("Fetching quarterly balance sheet...")
-        quarterly_balance = stock.quarterly_balance_sheet
-        
-        print("Fetching historical price data...")
-        start_date = f"{year}-01-01"
-        end_date = f"{year}-12-31"
-        price_history = stock.history(start=start_date, end=end_date)
+        if price_history is None:
+            YAHOO_LIMITER.acquire()
+            print("Fetching historical price data...")
+            start_date = f"{year}-01-01"
+            end_date = f"{year}-12-31"
+            price_history = stock.history(start=start_date, end=end_date)
     except Exception as e:
         print(f"Error fetching data: {e}")
+        if lib_RateLimiter.is_throttle_error(e):
+            YAHOO_LIMITER.on_throttle()
         return pd.DataFrame()
     
+    YAHOO_LIMITER.on_success()
     if price_history.empty:
+        # Throttling raises (see lib_RateLimiter.is_throttle_error); empty data means there is none
+        NO_PRICE_DATA.add((ticker.upper(), year))
         print(f"No historical price data available for {ticker} in {year}")
         return pd.DataFrame()
     
-    # Calculate P/E for each quarter
-    results = []
-    
-    # Get quarters in the year
-    quarters = [col for col in quarterly_income.columns if col.year == year]
+    # Quarters of the year, in the statement's column order
+    columns = pd.DatetimeIndex(quarterly_income.columns)
+    quarters = columns[columns.year == year]
     
-    if not quarters:
+    if len(quarters) == 0:
         print(f"No quarterly data available for {ticker} in {year}")
         return pd.DataFrame()
     
-    for quarter_end in quarters:
-        # Get net income for the quarter
-        try:
-            # Try different possible names for net income
-            net_income = None
-            for income_name in ['Net Income', 'Net Income Common Stockholders']:
-                if income_name in quarterly_income.index:
-                    net_income = quarterly_income.loc[income_name, quarter_end]
-                    break
-            
-            if net_income is None:
-                print(f"Could not find net income for {quarter_end}")
-                continue
-            
-            # Get outstanding shares
-            shares = None
-            share_names = ['Common Stock', 'Common Stock Shares Outstanding', 'Shares Outstanding']
-            
-            for name in share_names:
-                if name in quarterly_balance.index:
-                    shares = quarterly_balance.loc[name, quarter_end]
-                    break
-            
-            if shares is None:
-                # As a fallback, get shares outstanding from info
-                shares = stock.info.get('sharesOutstanding', None)
-                
-            if shares is None or shares == 0:
-                print(f"Could not find valid shares outstanding for {quarter_end}")
-                continue
-            
-            # Calculate EPS
-            eps = net_income / shares
-            
-            # Get stock price at quarter end
-            quarter_end_str = quarter_end.strftime('%Y-%m-%d')
-            # Find closest date if exact date not available
-            closest_dates = price_history.index[price_history.index <= quarter_end_str]
-            if len(closest_dates) > 0:
-                closest_date = closest_dates[-1]
-                price = price_history.loc[closest_date, 'Close']
-            else:
-                # If no earlier date is found, use the first available date
-                price = price_history.iloc[0]['Close']
-            
-            # Calculate P/E
-            pe_ratio = price / eps
-            
-            # Format quarter name (Q1, Q2, etc.)
-            quarter_num = (quarter_end.month - 1) // 3 + 1
-            quarter_name = f"Q{quarter_num} {year}"
-            
-            results.append({
-                'Quarter': quarter_name,
-                'Date': quarter_end.strftime('%Y-%m-%d'),
-                'Price': price,
-                'EPS': eps,
-                'P/E Ratio': pe_ratio
-            })
-            
-        except (KeyError, ZeroDivisionError, TypeError) as e:
-            print(f"Error calculating P/E for {quarter_end}: {e}")
+    # Try different possible names for net income
+    income_names = [name for name in ['Net Income', 'Net Income Common Stockholders'] if name in quarterly_income.index]
+    if not income_names:
+        print(f"Could not find net income for {ticker}")
+        return pd.DataFrame()
+    net_income = pd.to_numeric(quarterly_income.loc[income_names[0]].reindex(quarters), errors='coerce').to_numpy()
+    
+    # Get outstanding shares for all quarters at once
+    share_names = [name for name in ['Common Stock', 'Common Stock Shares Outstanding', 'Shares Outstanding']
+                   if name in quarterly_balance.index]
+    if share_names:
+        reported = quarters.isin(pd.DatetimeIndex(quarterly_balance.columns))
+        shares = pd.to_numeric(quarterly_balance.loc[share_names[0]].reindex(quarters), errors='coerce').to_numpy()
+    else:
+        # As a fallback, get shares outstanding from info
+        info_shares = get_fundamental(stock, ticker, 'info', "company info").get('sharesOutstanding', None)
+        reported = np.full(len(quarters), info_shares is not None)
+        shares = np.full(len(quarters), np.nan if info_shares is None else float(info_shares))
+    
+    valid = reported & (shares != 0)
+    if not valid.all():
+        missing = ', '.join(quarters[~valid].strftime('%Y-%m-%d'))
+        print(f"Could not find valid shares outstanding for {missing}")
+    quarters = quarters[valid]
+    net_income = net_income[valid]
+    shares = shares[valid]
+    
+    # Resolve every quarter end to the last close on or before it in one lookup;
+    # if no earlier date is found, use the first available date
+    prices = PriceSeries.from_frame(price_history)
+    positions = prices.resolve(quarters.values, PREVIOUS)
+    price = prices.closes[np.where(positions >= 0, positions, 0)]
+    
+    # Calculate EPS and P/E for all quarters
+    with np.errstate(divide='ignore', invalid='ignore'):
+        eps = net_income / shares
+        pe_ratio = price / eps
+    
+    return pd.DataFrame({
+        'Quarter': [f"Q{quarter} {year}" for quarter in quarters.quarter],
+        'Date': quarters.strftime('%Y-%m-%d'),
+        'Price': price,
+        'EPS': eps,
+        'P/E Ratio': pe_ratio
+    })
+
+def download_year_histories(tickers, years):
+    """
+    Download the prices of every ticker without a current snapshot, one batched request per year
     
-    return pd.DataFrame(results)
+    Parameters:
+    tickers (list): Stock ticker symbols
+    years (list): Years to analyze
+    
+    Returns:
+    dict: {year: {ticker: pd.DataFrame with daily prices}}
+    """
+    return {
+        year: download_price_histories([ticker for ticker in tickers if load_known_pe(ticker, year).empty], year)
+        for year in years
+    }
+
+def compute_quarterly_pe(ticker, years, histories):
+    """
+    Compute the quarterly P/E ratios of one ticker over several years
+    
+    Parameters:
+    ticker (str): Stock ticker symbol
+    years (list): Years to analyze
+    histories (dict): Prices from download_year_histories
+    
+    Returns:
+    pd.DataFrame: Quarterly P/E ratios of all years, empty when there is no data
+    """
+    frames = [get_quarterly_pe_with_retry(ticker, year, price_history=histories.get(year, {}).get(ticker))
+              for year in years]
+    frames = [frame for frame in frames if not frame.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+def iter_quarterly_pe(tickers, years, max_workers=4):
+    """
+    Compute quarterly P/E ratios of many tickers in parallel, yielding each ticker as it completes
+    
+    Tickers without a current snapshot get their prices from one batched
+    download per year; statements are then fetched by a bounded thread pool
+    sharing YAHOO_LIMITER.
+    
+    Parameters:
+    tickers (list): Stock ticker symbols (e.g. all listings of a company or a sector)
+    years (list): Years to analyze
+    max_workers (int): Maximum number of tickers processed at the same time
+    
+    Yields:
+    tuple: (ticker, pd.DataFrame with the quarterly P/E ratios of all years, None when computing failed)
+    """
+    histories = download_year_histories(tickers, years)
+    yield from lib_PEBatch.iter_computed(tickers, lambda ticker: compute_quarterly_pe(ticker, years, histories),
+                                         max_workers)
+
+def get_quarterly_pe_batch(tickers, year, max_workers=4):
+    """
+    Get quarterly P/E ratios of many tickers in parallel
+    
+    Parameters:
+    tickers (list): Stock ticker symbols (e.g. all listings of a company or a sector)
+    year (int): Year to analyze
+    max_workers (int): Maximum number of tickers processed at the same time
+    
+    Returns:
+    dict: {ticker: pd.DataFrame with quarterly P/E ratios} in the order of tickers
+    """
+    results = dict(iter_quarterly_pe(tickers, [year], max_workers))
+    return {ticker: results[ticker] if results[ticker] is not None else pd.DataFrame() for ticker in tickers}
+
+def compare_listings(tickers, year):
+    """
+    Compute and compare quarterly P/E ratios of many tickers in one run
+    
+    Parameters:
+    tickers (list): Stock ticker symbols
+    year (int): Year to analyze
+    """
+    print(f"\nFetching quarterly P/E ratios for {len(tickers)} tickers in {year}...")
+    results = get_quarterly_pe_batch(tickers, year)
+    results = {ticker: quarterly_pe for ticker, quarterly_pe in results.items() if not quarterly_pe.empty}
+    
+    if not results:
+        print("No P/E data available for the specified tickers and year.")
+        return
+    
+    # One long table with a Ticker column, quarters side by side per listing
+    comparison = pd.concat(results, names=['Ticker']).reset_index(level=0).reset_index(drop=True)
+    print("\nQuarterly P/E Ratios:")
+    print(comparison.pivot(index='Quarter', columns='Ticker', values='P/E Ratio'))
+    
+    csv_filename = f"Comparison_PE_Ratios_{year}.csv"
+    comparison.to_csv(csv_filename, index=False)
+    print(f"Data saved to {csv_filename}")
+    
+    for path in lib_ChartRender.render_pe_charts(results, year):
+        print(f"Plot saved as {path}")
+
+def run_batch(tickers, year_from, year_to, out_path, chart_dir=None, max_workers=4, resume=True):
+    """
+    Compute quarterly P/E ratios of many tickers without any user interaction
+    
+    Results are appended to out_path as each ticker completes, so an
+    interrupted run keeps its progress and a rerun only computes the
+    tickers that are still missing (see lib_PEBatch.run_batch).
+    
+    Parameters:
+    tickers (list): Stock ticker symbols
+    year_from (int): First year to analyze
+    year_to (int): Last year to analyze
+    out_path (str): Results file, JSON lines or CSV (see lib_ResultSink)
+    chart_dir (str): Directory for headless PNG charts (default: no charts)
+    max_workers (int): Maximum number of tickers processed at the same time
+    resume (bool): Skip tickers already in out_path (False: overwrite it)
+    
+    Returns:
+    int: Number of tickers written in this run
+    """
+    years = list(range(year_from, year_to + 1))
+    histories = {}
+    
+    def prepare(pending):
+        # Only the tickers still to compute are downloaded
+        histories.update(download_year_histories(pending, years))
+    
+    return lib_PEBatch.run_batch(tickers, lambda ticker: compute_quarterly_pe(ticker, years, histories),
+                                 year_from, year_to, out_path, chart_dir, max_workers, resume, prepare)
+
+def parse_args(argv=None):
+    parser = lib_PEBatch.build_parser(
+        'Quarterly P/E ratios from Yahoo Finance. Without tickers an interactive menu is shown.')
+    return lib_PEBatch.parse_args(parser, argv)
 
 def main():
+    args = parse_args()
+    if not lib_PEBatch.is_batch(args):
+        interactive_main()
+        return
+    tickers = lib_PEBatch.read_tickers(args)
+    if tickers:
+        run_batch(tickers, args.year_from, args.year_to, args.out, args.charts, args.workers, not args.no_resume)
+
+def interactive_main():
     # Get list of Google tickers
     print("Getting list of Google tickers...")
     goog_tickers = get_goog_tickers()
@@ -230,10 +476,14 @@ def main():
     for i, ticker_info in enumerate(goog_tickers):
         print(f"{i+1}. {ticker_info['symbol']} - {ticker_info['name']}")
     
+    print("A. All listings")
+    
     # Let user select a ticker
     while True:
         try:
-            selection = input("\nSelect a ticker number (or 0 to quit): ")
+            selection = input("\nSelect a ticker number or A for all listings (or 0 to quit): ").strip()
+            if selection.upper() == 'A':
+                break
             selection = int(selection)
             if selection == 0:
                 return
@@ -243,11 +493,15 @@ def main():
         except ValueError:
             print("Please enter a valid number")
     
-    selected_ticker = goog_tickers[selection-1]['symbol']
-    
     # Set the year
     year = 2010
     
+    if selection in ('A', 'a'):
+        compare_listings([ticker_info['symbol'] for ticker_info in goog_tickers], year)
+        return
+    
+    selected_ticker = goog_tickers[selection-1]['symbol']
+    
     print(f"\nFetching quarterly P/E ratios for {selected_ticker} in {year}...")
     print("This may take a moment. Using multiple data sources with rate limit handling...")
     
@@ -270,25 +524,7 @@ def main():
     
     # Plot the results - only if we have data
     if not quarterly_pe.empty:
-        plt.figure(figsize=(10, 6))
-        quarters = quarterly_pe['Quarter'].tolist()
-        pe_ratios = quarterly_pe['P/E Ratio'].tolist()
-        
-        plt.bar(range(len(quarters)), pe_ratios)
-        plt.xticks(range(len(quarters)), quarters)
-        plt.title(f"{selected_ticker} Quarterly P/E Ratios - {year}")
-        plt.ylabel("P/E Ratio")
-        plt.xlabel("Quarter")
-        plt.grid(axis='y', linestyle='--', alpha=0.7)
-        
-        # Add values above bars
-        for i, value in enumerate(pe_ratios):
-            plt.text(i, value + 1, f"{value:.2f}", ha='center')
-        
-        plt.tight_layout()
-        plt.savefig(f"{selected_ticker}_PE_Ratios_{year}.png")
-        print(f"Plot saved as {selected_ticker}_PE_Ratios_{year}.png")
-        plt.show()
+        lib_ChartRender.plot_quarterly_pe(quarterly_pe, selected_ticker, year)
 
 if __name__ == "__main__":
     main()    
\ No newline at end of file
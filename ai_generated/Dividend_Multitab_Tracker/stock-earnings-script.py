@@ -1,8 +1,16 @@
 import yfinance as yf
 import pandas as pd
-import matplotlib.pyplot as plt
 from datetime import datetime
 import argparse
+import os
+import sys
+
+# Make the shared FinSources library importable
+_LIB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '!Proj_FinSources', 'lib')
+if _LIB_DIR not in sys.path:
+    sys.path.insert(0, _LIB_DIR)
+
+import lib_ChartRender
 
 def get_quarterly_earnings(ticker_symbol, periods=8):
     """
@@ -35,44 +43,29 @@ def get_quarterly_earnings(ticker_symbol, periods=8):
     
     return earnings
 
-def visualize_earnings(earnings_data, ticker_symbol):
+def visualize_earnings(earnings_data, ticker_symbol, show=True):
     """
     Create a visualization of quarterly earnings.
     
     Parameters:
     earnings_data (pandas.DataFrame): The quarterly earnings data
     ticker_symbol (str): The stock ticker symbol
+    show (bool): Open an interactive window; False renders the PNG headlessly
     """
-    plt.figure(figsize=(12, 6))
-    
-    # EPS visualization
-    plt.subplot(1, 2, 1)
-    plt.bar(earnings_data['Quarter'], earnings_data['EPS Actual'])
-    plt.plot(earnings_data['Quarter'], earnings_data['EPS Estimate'], 'r--o', label='EPS Estimate')
-    plt.title(f'{ticker_symbol} Quarterly EPS')
-    plt.xticks(rotation=45)
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    
-    # Surprise percentage visualization
-    plt.subplot(1, 2, 2)
-    plt.bar(earnings_data['Quarter'], earnings_data['Surprise(%)'])
-    plt.axhline(y=0, color='r', linestyle='-', alpha=0.3)
-    plt.title(f'{ticker_symbol} Earnings Surprise %')
-    plt.xticks(rotation=45)
-    plt.grid(True, alpha=0.3)
-    
-    plt.tight_layout()
-    plt.savefig(f"{ticker_symbol}_earnings.png")
-    plt.show()
+    png_filename = f"{ticker_symbol}_earnings.png"
+    chart = lib_ChartRender.show_chart if show else lib_ChartRender.render_chart
+    chart('earnings', png_filename, earnings_data=earnings_data, ticker=ticker_symbol)
 
-def display_earnings_info(ticker_symbol, periods=8):
+def display_earnings_info(ticker_symbol, periods=8, show=True, renderer=None, out_dir="."):
     """
     Display quarterly earnings information for a stock.
     
     Parameters:
     ticker_symbol (str): The stock ticker symbol
     periods (int): Number of recent quarters to display
+    show (bool): Open the chart in an interactive window
+    renderer (ChartRenderer): Render the chart in this process pool instead (batch mode)
+    out_dir (str): Directory for charts rendered by renderer
     """
     print(f"\nRetrieving quarterly earnings data for {ticker_symbol}...\n")
     
@@ -99,12 +92,26 @@ def display_earnings_info(ticker_symbol, periods=8):
     print(f"Average surprise: {earnings_data['Surprise(%)'].mean():.2f}%")
     
     # Create visualization
-    visualize_earnings(earnings_data, ticker_symbol)
+    if renderer is not None:
+        renderer.submit('earnings', os.path.join(out_dir, f"{ticker_symbol}_earnings.png"),
+                        earnings_data=earnings_data, ticker=ticker_symbol)
+    else:
+        visualize_earnings(earnings_data, ticker_symbol, show)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Retrieve quarterly earnings data for a stock.')
-    parser.add_argument('ticker', type=str, help='Stock ticker symbol (e.g., AAPL)')
+    parser.add_argument('tickers', type=str, nargs='+', help='Stock ticker symbol(s) (e.g., AAPL)')
     parser.add_argument('--periods', type=int, default=8, help='Number of recent quarters to display (default: 8)')
+    parser.add_argument('--headless', action='store_true', help='Only write PNG files, do not open chart windows')
+    parser.add_argument('--out-dir', default='.', help='Directory for charts in headless mode (default: .)')
+    parser.add_argument('--processes', type=int, default=None, help='Chart rendering processes (default: number of CPUs)')
     
     args = parser.parse_args()
-    display_earnings_info(args.ticker.upper(), args.periods)
+    tickers = [ticker.upper() for ticker in args.tickers]
+    if args.headless or len(tickers) > 1:
+        # Charts render in a process pool while the next ticker is being downloaded
+        with lib_ChartRender.ChartRenderer(args.processes) as renderer:
+            for ticker in tickers:
+                display_earnings_info(ticker, args.periods, renderer=renderer, out_dir=args.out_dir)
+    else:
+        display_earnings_info(tickers[0], args.periods)
@@ -1,9 +1,17 @@
-import requests
 import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
 from datetime import datetime
 import os
+import sys
+
+# Make the shared FinSources library importable
+_LIB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '!Proj_FinSources', 'lib')
+if _LIB_DIR not in sys.path:
+    sys.path.insert(0, _LIB_DIR)
+
+import lib_ChartRender
+import lib_Earnings
+import lib_FiscalCalendar
+import lib_FmpClient
 
 # You'll need to get your own API key by signing up at https://financialmodelingprep.com/developer/docs/
 # Free tier allows limited requests per day
@@ -19,12 +27,13 @@ def get_apple_earnings_since_2015(api_key):
     Returns:
     pandas.DataFrame: Quarterly earnings data
     """
-    # Base URL for Financial Modeling Prep API
-    base_url = "https://financialmodelingprep.com/api/v3/earnings-surprises/AAPL"
-    
-    # Make API request
-    response = requests.get(f"{base_url}?apikey={api_key}")
+    # Make API request through the shared pooled, rate-limited FMP client
+    client = lib_FmpClient.get_default_client()
+    response = client.request("earnings-surprises/AAPL", api_key=api_key)
     
+    if response is None:
+        print("Error fetching data: connection failed")
+        return None
     if response.status_code != 200:
         print(f"Error fetching data: Status code {response.status_code}")
         print(response.text)
@@ -49,15 +58,11 @@ def get_apple_earnings_since_2015(api_key):
     earnings_data = earnings_data.sort_values('Earnings Date')
     
     # Add quarter notation
-    earnings_data['Quarter'] = earnings_data['Earnings Date'].dt.strftime('%Y-Q%q')
+    earnings_data['Quarter'] = lib_FiscalCalendar.quarter_labels(earnings_data['Earnings Date'])
     
     # Create fiscal year column (Apple's fiscal year ends in September)
-    def get_fiscal_year(date):
-        if date.month >= 10:  # October onwards is next fiscal year
-            return date.year + 1
-        return date.year
-    
-    earnings_data['Fiscal Year'] = earnings_data['Earnings Date'].apply(get_fiscal_year)
+    lib_FiscalCalendar.get_default_calendar().add_fiscal_columns(
+        earnings_data, 'Earnings Date', ticker='AAPL', quarter_column=None)
     
     return earnings_data
 
@@ -71,12 +76,13 @@ def get_apple_quarterly_revenue_since_2015(api_key):
     Returns:
     pandas.DataFrame: Quarterly revenue data
     """
-    # Base URL for Financial Modeling Prep API income statements
-    base_url = "https://financialmodelingprep.com/api/v3/income-statement/AAPL"
-    
-    # Make API request for quarterly data
-    response = requests.get(f"{base_url}?period=quarter&limit=100&apikey={api_key}")
+    # Make API request for quarterly data through the shared FMP client
+    client = lib_FmpClient.get_default_client()
+    response = client.request("income-statement/AAPL", {"period": "quarter", "limit": 100}, api_key)
     
+    if response is None:
+        print("Error fetching revenue data: connection failed")
+        return None
     if response.status_code != 200:
         print(f"Error fetching revenue data: Status code {response.status_code}")
         print(response.text)
@@ -101,7 +107,7 @@ def get_apple_quarterly_revenue_since_2015(api_key):
     
     # Format the data
     revenue_data = revenue_data.sort_values('Report Date')
-    revenue_data['Quarter'] = revenue_data['Report Date'].dt.strftime('%Y-Q%q')
+    revenue_data['Quarter'] = lib_FiscalCalendar.quarter_labels(revenue_data['Report Date'])
     
     # Convert to millions for better display
     revenue_data['Revenue (Millions)'] = revenue_data['Revenue'] / 1000000
@@ -109,62 +115,18 @@ def get_apple_quarterly_revenue_since_2015(api_key):
     
     return revenue_data
 
-def visualize_apple_earnings(earnings_data, revenue_data=None):
+def visualize_apple_earnings(earnings_data, revenue_data=None, show=True):
     """
     Create visualizations of Apple's quarterly earnings and revenue.
     
     Parameters:
     earnings_data (pandas.DataFrame): The quarterly earnings data
     revenue_data (pandas.DataFrame, optional): The quarterly revenue data
+    show (bool): Open an interactive window; False renders the PNG headlessly
     """
-    if revenue_data is not None:
-        fig = plt.figure(figsize=(15, 15))
-        num_rows = 3
-    else:
-        fig = plt.figure(figsize=(15, 10))
-        num_rows = 2
-    
-    # EPS visualization
-    plt.subplot(num_rows, 1, 1)
-    width = 0.35
-    x = np.arange(len(earnings_data['Quarter']))
-    
-    plt.bar(x - width/2, earnings_data['EPS Actual'], width, label='EPS Actual')
-    plt.bar(x + width/2, earnings_data['EPS Estimate'], width, label='EPS Estimate')
-    
-    plt.title('Apple (AAPL) Quarterly EPS Since 2015')
-    plt.xlabel('Quarter')
-    plt.ylabel('Earnings Per Share ($)')
-    plt.xticks(x, earnings_data['Quarter'], rotation=90)
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    
-    # Surprise percentage visualization
-    plt.subplot(num_rows, 1, 2)
-    colors = ['green' if x >= 0 else 'red' for x in earnings_data['Surprise(%)']]
-    plt.bar(earnings_data['Quarter'], earnings_data['Surprise(%)'], color=colors)
-    plt.axhline(y=0, color='black', linestyle='-', alpha=0.3)
-    plt.title('Apple (AAPL) Earnings Surprise % Since 2015')
-    plt.xlabel('Quarter')
-    plt.ylabel('Surprise (%)')
-    plt.xticks(rotation=90)
-    plt.grid(True, alpha=0.3)
-    
-    # Revenue visualization (if data is available)
-    if revenue_data is not None:
-        plt.subplot(num_rows, 1, 3)
-        plt.plot(revenue_data['Quarter'], revenue_data['Revenue (Millions)'], 'b-o', label='Revenue')
-        plt.plot(revenue_data['Quarter'], revenue_data['Net Income (Millions)'], 'g-o', label='Net Income')
-        plt.title('Apple (AAPL) Quarterly Revenue and Net Income Since 2015')
-        plt.xlabel('Quarter')
-        plt.ylabel('Amount ($ Millions)')
-        plt.xticks(rotation=90)
-        plt.legend()
-        plt.grid(True, alpha=0.3)
-    
-    plt.tight_layout()
-    plt.savefig("AAPL_earnings_since_2015.png")
-    plt.show()
+    chart = lib_ChartRender.show_chart if show else lib_ChartRender.render_chart
+    chart('earnings_history', "AAPL_earnings_since_2015.png", earnings_data=earnings_data,
+          ticker='Apple (AAPL)', since=2015, revenue_data=revenue_data)
 
 def display_apple_earnings_since_2015():
     """
@@ -196,26 +158,18 @@ def display_apple_earnings_since_2015():
     display_df = display_df.sort_values('Earnings Date', ascending=False)  # Show most recent first
     print(display_df)
     
-    # Basic analysis
-    beat_count = sum(earnings_data['EPS Actual'] > earnings_data['EPS Estimate'])
-    miss_count = sum(earnings_data['EPS Actual'] < earnings_data['EPS Estimate'])
-    match_count = sum(earnings_data['EPS Actual'] == earnings_data['EPS Estimate'])
+    # Basic analysis (vectorized, see lib_Earnings for the multi-ticker version)
+    summary = lib_Earnings.summarize_surprises(earnings_data, by=None).iloc[0]
     
     print(f"\nSummary for {len(earnings_data)} quarters since 2015:")
-    print(f"Beat expectations: {beat_count} times ({beat_count/len(earnings_data)*100:.1f}%)")
-    print(f"Missed expectations: {miss_count} times ({miss_count/len(earnings_data)*100:.1f}%)")
-    print(f"Met expectations: {match_count} times ({match_count/len(earnings_data)*100:.1f}%)")
-    print(f"Average surprise: {earnings_data['Surprise(%)'].mean():.2f}%")
+    print(f"Beat expectations: {int(summary['beat_count'])} times ({summary['beat_rate']:.1f}%)")
+    print(f"Missed expectations: {int(summary['miss_count'])} times ({summary['miss_rate']:.1f}%)")
+    print(f"Met expectations: {int(summary['meet_count'])} times ({summary['meet_rate']:.1f}%)")
+    print(f"Average surprise: {summary['avg_surprise']:.2f}%")
     
     # Analysis by fiscal year
     print("\nPerformance by Fiscal Year:")
-    yearly_analysis = earnings_data.groupby('Fiscal Year').agg(
-        avg_eps_actual=('EPS Actual', 'mean'),
-        avg_eps_estimate=('EPS Estimate', 'mean'),
-        avg_surprise=('Surprise(%)', 'mean'),
-        beat_count=('Surprise(%)', lambda x: sum(x > 0)),
-        quarters=('Quarter', 'count')
-    )
+    yearly_analysis = lib_Earnings.fiscal_year_stats(earnings_data, by=())
     print(yearly_analysis)
     
     # Get revenue data if possible
@@ -3,6 +3,15 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from datetime import datetime
 import numpy as np
+import os
+import sys
+
+# Make the shared FinSources library importable
+_LIB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '!Proj_FinSources', 'lib')
+if _LIB_DIR not in sys.path:
+    sys.path.insert(0, _LIB_DIR)
+
+import lib_FiscalCalendar
 
 def get_apple_earnings_since_2015():
     """
@@ -28,16 +37,12 @@ def get_apple_earnings_since_2015():
     earnings = earnings.sort_values('Earnings Date')
     
     # Convert earnings date to readable format and create fiscal quarter notation
-    earnings['Quarter'] = earnings['Earnings Date'].dt.strftime('%Y-Q%q')
+    earnings['Quarter'] = lib_FiscalCalendar.quarter_labels(earnings['Earnings Date'])
     
     # Create fiscal year column
     # Apple's fiscal year ends in September
-    def get_fiscal_year(date):
-        if date.month >= 10:  # October onwards is next fiscal year
-            return date.year + 1
-        return date.year
-    
-    earnings['Fiscal Year'] = earnings['Earnings Date'].apply(get_fiscal_year)
+    lib_FiscalCalendar.get_default_calendar().add_fiscal_columns(
+        earnings, 'Earnings Date', ticker='AAPL', quarter_column=None)
     
     return earnings
 